@@ -1,5 +1,6 @@
 from core.assignment_engine import match_resources
-from core.conflict_detector import detect_conflicts
+from core.conflict_detector import detect_conflicts_bulk
+from core.sheets_service import get_fleet_snapshot
 import logging
 
 
@@ -7,11 +8,15 @@ import logging
 # DECISION ENGINE
 # ===============================
 
-def decide_best_assignment(project_id):
+def decide_best_assignment(project_id, snapshot=None):
 
     try:
 
-        result = match_resources(project_id)
+        # Match and conflict checks read the same fleet snapshot
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
+
+        result = match_resources(project_id, snapshot)
 
         if isinstance(result, str):
 
@@ -40,18 +45,29 @@ def decide_best_assignment(project_id):
         drone = drones.iloc[0]
         drone_id = drone["drone_id"]
 
+        # Check every ranked pilot against the drone in one pass
+        checks = detect_conflicts_bulk(
+            project_id,
+            pilots["pilot_id"].tolist(),
+            [drone_id],
+            snapshot
+        )
+
+        if isinstance(checks, str):
+
+            return {
+                "status": "error",
+                "message": checks
+            }
+
+        conflict_free = checks["conflict_free"].to_numpy()
+
         # Find conflict-free pilot
-        for _, pilot in pilots.iterrows():
+        for row, (_, pilot) in enumerate(pilots.iterrows()):
 
             pilot_id = pilot["pilot_id"]
 
-            conflict = detect_conflicts(
-                project_id,
-                pilot_id,
-                drone_id
-            )
-
-            if conflict == "No conflicts detected":
+            if conflict_free[row]:
 
                 explanation = f"""
 Pilot {pilot['name']} selected because:
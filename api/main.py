@@ -1,15 +1,50 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 
-from core.sheets_service import get_pilots, get_drones, get_missions
+from fastapi import FastAPI, Depends, Query, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from core.sheets_service import to_records, start_background_warmup
+from api.responses import (
+    encoded_tables,
+    encode_records,
+    body_etag,
+    version_etag,
+    etag_matches,
+    json_bytes_response,
+    not_modified_response
+)
+from core.roster_query import query_table, table_delta
+from core.data_backends import PILOTS_TABLE, DRONES_TABLE, MISSIONS_TABLE
+from core.async_data import ensure_tables, executor
 from core.assignment_engine import match_resources
-from core.conflict_detector import detect_conflicts
+from core.conflict_detector import detect_conflicts, detect_conflicts_bulk
 from core.reassignment_engine import urgent_reassign
+from core.batch_solver import solve_batch_assignment
 from ai.decision_engine import decide_best_assignment
 
+import orjson
 import logging
 
 
+# ===============================
+# APP LIFESPAN
+# ===============================
+# Startup returns immediately: caches are warmed on a background thread
+# and the data backend connects on first use.
+
+@asynccontextmanager
+async def lifespan(app):
+
+    start_background_warmup()
+
+    yield
+
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
 # ===============================
 # CREATE FASTAPI APP
 # ===============================
@@ -17,7 +52,9 @@ import logging
 app = FastAPI(
     title="Skylark Drone Operations AI Agent",
     description="AI-powered drone fleet coordination system",
-    version="1.0"
+    version="1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 
@@ -31,6 +68,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 
@@ -39,7 +77,7 @@ app.add_middleware(
 # ===============================
 
 @app.get("/")
-def root():
+async def root():
 
     return {
         "message": "Skylark Drone Operations AI Agent Running",
@@ -47,18 +85,192 @@ def root():
     }
 
 
+# ===============================
+# ROSTER LISTING
+# ===============================
+# GET /pilots, /drones, /missions accept:
+#   status, location, skill    server-side filters
+#   fields=pilot_id,name       column projection
+#   limit, cursor              pagination, next cursor in X-Next-Cursor
+#   format=ndjson              one JSON object per line, streamed
+#   since=<version>            only rows changed since that version
+#                              (fields only, no filters or paging)
+# JSON responses carry an ETag and answer If-None-Match with 304. The
+# full-table ETag is the table version to pass back as ?since=.
+
+NDJSON_CHUNK_ROWS = 1000
+
+
+class RosterQuery:
+
+
+    def __init__(
+        self,
+        status: str | None = None,
+        location: str | None = None,
+        skill: str | None = None,
+        fields: str | None = None,
+        cursor: str | None = None,
+        limit: int | None = Query(None, ge=1),
+        format: str = Query("json", pattern="^(json|ndjson)$"),
+        since: str | None = None,
+        if_none_match: str | None = Header(None)
+    ):
+
+        self.status = status
+        self.location = location
+        self.skill = skill
+        self.fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        self.cursor = cursor
+        self.limit = limit
+        self.format = format
+        self.since = since
+        self.if_none_match = if_none_match
+
+
+    def is_full_table(self):
+
+        return self.format == "json" and not any((
+            self.status,
+            self.location,
+            self.skill,
+            self.fields,
+            self.cursor,
+            self.limit,
+            self.since
+        ))
+
+
+    def unsupported_with_since(self):
+
+        # A delta is the changed rows of the whole table; filtering or
+        # paging it would hide changes from the client
+        return [
+            name
+            for name, value in (
+                ("status", self.status),
+                ("location", self.location),
+                ("skill", self.skill),
+                ("cursor", self.cursor),
+                ("limit", self.limit),
+                ("format", self.format != "json")
+            )
+            if value
+        ]
+
+
+def iter_ndjson(rows):
+
+    for start in range(0, len(rows), NDJSON_CHUNK_ROWS):
+
+        records = to_records(rows.iloc[start:start + NDJSON_CHUNK_ROWS])
+
+        yield b"".join(orjson.dumps(record) + b"\n" for record in records)
+
+
+async def delta_table(table, query):
+
+    unsupported = query.unsupported_with_since()
+
+    if unsupported:
+        return {"error": f"since cannot be combined with: {', '.join(unsupported)}"}
+
+    try:
+
+        version, full, rows, deleted = await run_in_threadpool(
+            table_delta,
+            table,
+            query.since,
+            fields=query.fields
+        )
+
+    except ValueError as e:
+
+        return {"error": str(e)}
+
+    etag = version_etag(version)
+
+    # Client is already up to date
+    if version == query.since:
+        return not_modified_response(etag)
+
+    body = await run_in_threadpool(lambda: orjson.dumps({
+        "version": version,
+        "full": full,
+        "changed": to_records(rows),
+        "deleted": deleted
+    }))
+
+    return json_bytes_response(body, etag)
+
+
+async def list_table(table, query):
+
+    await ensure_tables(table)
+
+    if query.since is not None:
+        return await delta_table(table, query)
+
+    # Whole table: pre-encoded bytes for the current snapshot
+    if query.is_full_table():
+
+        body, etag = await run_in_threadpool(encoded_tables.get, table)
+
+        if etag_matches(query.if_none_match, etag):
+            return not_modified_response(etag)
+
+        return json_bytes_response(body, etag)
+
+    try:
+
+        rows, next_cursor = await run_in_threadpool(
+            query_table,
+            table,
+            status=query.status,
+            location=query.location,
+            skill=query.skill,
+            fields=query.fields,
+            cursor=query.cursor,
+            limit=query.limit
+        )
+
+    except ValueError as e:
+
+        return {"error": str(e)}
+
+    headers = {}
+
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+
+    if query.format == "ndjson":
+
+        return StreamingResponse(
+            iter_ndjson(rows),
+            media_type="application/x-ndjson",
+            headers=headers
+        )
+
+    body = await run_in_threadpool(encode_records, rows)
+
+    etag = body_etag(body)
+
+    if etag_matches(query.if_none_match, etag):
+        return not_modified_response(etag)
+
+    return json_bytes_response(body, etag, headers)
+
+
 # ===============================
 # GET ALL PILOTS
 # ===============================
 
 @app.get("/pilots")
-def get_all_pilots():
+async def get_all_pilots(query: RosterQuery = Depends()):
 
     try:
 
-        pilots = get_pilots()
-
-        return pilots.to_dict(orient="records")
+        return await list_table(PILOTS_TABLE, query)
 
     except Exception as e:
 
@@ -72,13 +284,11 @@ def get_all_pilots():
 # ===============================
 
 @app.get("/drones")
-def get_all_drones():
+async def get_all_drones(query: RosterQuery = Depends()):
 
     try:
 
-        drones = get_drones()
-
-        return drones.to_dict(orient="records")
+        return await list_table(DRONES_TABLE, query)
 
     except Exception as e:
 
@@ -92,13 +302,11 @@ def get_all_drones():
 # ===============================
 
 @app.get("/missions")
-def get_all_missions():
+async def get_all_missions(query: RosterQuery = Depends()):
 
     try:
 
-        missions = get_missions()
-
-        return missions.to_dict(orient="records")
+        return await list_table(MISSIONS_TABLE, query)
 
     except Exception as e:
 
@@ -112,18 +320,22 @@ def get_all_missions():
 # ===============================
 
 @app.get("/match/{project_id}")
-def match(project_id: str):
+async def match(project_id: str):
+
+    await ensure_tables()
 
-    result = match_resources(project_id)
+    result = await run_in_threadpool(match_resources, project_id)
 
     if isinstance(result, str):
 
         return {"error": result}
 
-    return {
-        "pilots": result["pilots"].to_dict(orient="records"),
-        "drones": result["drones"].to_dict(orient="records")
-    }
+    body = await run_in_threadpool(lambda: orjson.dumps({
+        "pilots": to_records(result["pilots"]),
+        "drones": to_records(result["drones"])
+    }))
+
+    return json_bytes_response(body)
 
 
 # ===============================
@@ -131,32 +343,99 @@ def match(project_id: str):
 # ===============================
 
 @app.get("/assign/{project_id}")
-def assign(project_id: str):
+async def assign(project_id: str):
+
+    await ensure_tables()
 
-    result = decide_best_assignment(project_id)
+    result = await run_in_threadpool(decide_best_assignment, project_id)
 
     return result
 
 
+# ===============================
+# BATCH ASSIGNMENT
+# ===============================
+
+class BatchAssignRequest(BaseModel):
+
+    project_ids: list[str]
+
+
+@app.post("/assign/batch")
+async def assign_batch(request: BatchAssignRequest):
+
+    await ensure_tables()
+
+    result = await run_in_threadpool(
+        solve_batch_assignment,
+        request.project_ids
+    )
+
+    if isinstance(result, str):
+
+        return {"error": result}
+
+    return {"result": result}
+
+
 # ===============================
 # CONFLICT DETECTION
 # ===============================
 
 @app.get("/conflicts/{project_id}/{pilot_id}/{drone_id}")
-def conflicts(project_id: str, pilot_id: str, drone_id: str):
+async def conflicts(project_id: str, pilot_id: str, drone_id: str):
+
+    await ensure_tables()
 
-    result = detect_conflicts(project_id, pilot_id, drone_id)
+    result = await run_in_threadpool(
+        detect_conflicts,
+        project_id,
+        pilot_id,
+        drone_id
+    )
 
     return {"result": result}
 
 
+# ===============================
+# BULK CONFLICT DETECTION
+# ===============================
+
+class BulkConflictRequest(BaseModel):
+
+    project_id: str
+    pilot_ids: list[str]
+    drone_ids: list[str]
+
+
+@app.post("/conflicts/bulk")
+async def conflicts_bulk(request: BulkConflictRequest):
+
+    await ensure_tables()
+
+    result = await run_in_threadpool(
+        detect_conflicts_bulk,
+        request.project_id,
+        request.pilot_ids,
+        request.drone_ids
+    )
+
+    if isinstance(result, str):
+
+        return {"error": result}
+
+    return {"result": result.to_dict(orient="records")}
+
+
 # ===============================
 # URGENT REASSIGNMENT
 # ===============================
 
 @app.post("/reassign/{project_id}")
-def reassign(project_id: str):
+async def reassign(project_id: str):
+
+    await ensure_tables()
 
-    result = urgent_reassign(project_id)
+    result = await run_in_threadpool(urgent_reassign, project_id)
 
     return {"result": result}
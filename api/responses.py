@@ -0,0 +1,88 @@
+import hashlib
+import threading
+
+import orjson
+from fastapi.responses import Response
+
+from core.sheets_service import get_table_index, to_records
+
+
+# ===============================
+# ENCODED TABLE CACHE
+# ===============================
+# Full-table JSON bodies are encoded once per snapshot and served as
+# raw bytes, skipping FastAPI's validation and generic encoder. The ETag
+# is the table fingerprint, so every worker holding the same data hands
+# out the same tag, and clients can pass it back as ?since= for deltas.
+
+def encode_records(df):
+
+    return orjson.dumps(to_records(df))
+
+
+def body_etag(body):
+
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def version_etag(version):
+
+    return f'"{version}"'
+
+
+def etag_matches(if_none_match, etag):
+
+    if not if_none_match or not etag:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+    return etag in tags
+
+
+class EncodedTableCache:
+
+
+    def __init__(self):
+
+        self._entries = {}
+        self._lock = threading.Lock()
+
+
+    def get(self, table):
+
+        index = get_table_index(table)
+
+        entry = self._entries.get(table)
+
+        if entry is not None and entry[0] is index:
+            return entry[1], entry[2]
+
+        body = encode_records(index.df)
+        etag = version_etag(index.fingerprint())
+
+        with self._lock:
+            self._entries[table] = (index, body, etag)
+
+        return body, etag
+
+
+encoded_tables = EncodedTableCache()
+
+
+def json_bytes_response(body, etag=None, headers=None):
+
+    headers = dict(headers or {})
+
+    if etag:
+        headers["ETag"] = etag
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def not_modified_response(etag):
+
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,115 @@
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from core.fetch_scheduler import FetchScheduler
+
+
+# ===============================
+# FETCH SCHEDULER BENCHMARK
+# ===============================
+# Runs the upstream scheduler against a local fake backend that is slow
+# and answers part of its requests with HTTP 429. Many threads read the
+# same tables at once and every read must come back with the full
+# table, using far fewer upstream calls than reads.
+# Usage: python -m benchmarks.bench_fetch_scheduler [readers] [error_rate]
+
+TABLES = ("pilot_roster", "drone_fleet", "missions")
+
+
+class FakeResponse:
+
+
+    def __init__(self, status_code, retry_after=None):
+
+        self.status_code = status_code
+        self.headers = {"Retry-After": str(retry_after)} if retry_after else {}
+
+
+class FakeQuotaError(Exception):
+
+
+    def __init__(self):
+
+        super().__init__("429 Quota exceeded")
+
+        self.response = FakeResponse(429)
+
+
+class FakeBackend:
+
+    name = "fake"
+
+    rate_limited = True
+
+
+    def __init__(self, rows=1000, latency=0.05, error_rate=0.2, seed=7):
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+        self.tables = {
+            table: pd.DataFrame({"id": range(rows), "value": [table] * rows})
+            for table in TABLES
+        }
+
+
+    def fetch_table(self, table):
+
+        with self.lock:
+
+            self.calls += 1
+
+            fail = self.random.random() < self.error_rate
+
+        time.sleep(self.latency)
+
+        if fail:
+            raise FakeQuotaError()
+
+        return self.tables[table]
+
+
+def run(readers, error_rate):
+
+    backend = FakeBackend(error_rate=error_rate)
+
+    scheduler = FetchScheduler(per_minute=600, burst=5, retries=6, backoff_base=0.05)
+
+    def read(i):
+
+        table = TABLES[i % len(TABLES)]
+
+        return len(scheduler.run(backend.fetch_table, table, key=("fetch_table", table)))
+
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=readers) as pool:
+        sizes = list(pool.map(read, range(readers)))
+
+    elapsed = time.perf_counter() - start
+
+    assert all(size == len(backend.tables[TABLES[0]]) for size in sizes)
+
+    stats = scheduler.stats
+
+    print(
+        f"{readers:>6} reads | {backend.calls:>4} upstream calls | "
+        f"{stats['coalesced']:>5} coalesced | {stats['retries']:>3} retries | "
+        f"throttled {stats['throttled_seconds']:5.2f}s | {elapsed:5.2f}s"
+    )
+
+
+if __name__ == "__main__":
+
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    error_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+    run(readers, error_rate)
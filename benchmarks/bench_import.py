@@ -0,0 +1,60 @@
+import os
+import sys
+import subprocess
+import tempfile
+
+
+# ===============================
+# IMPORT-TIME BENCHMARK
+# ===============================
+# Cold import of each module in a fresh interpreter, best of N runs.
+# Importing must not touch the data backend, so this runs with the
+# default Sheets backend and no credentials configured.
+# Usage: python -m benchmarks.bench_import [modules...]
+
+MODULES = ["core.sheets_service", "api.main"]
+
+REPEAT = 5
+
+SNIPPET = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def import_time(module):
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    env = dict(os.environ)
+    env.pop("GOOGLE_CREDENTIALS_JSON", None)
+    env.pop("DATA_BACKEND", None)
+    env["PYTHONPATH"] = root
+
+    best = float("inf")
+
+    # Scratch working directory for the log file and snapshot store
+    with tempfile.TemporaryDirectory() as workdir:
+
+        for _ in range(REPEAT):
+
+            result = subprocess.run(
+                [sys.executable, "-c", SNIPPET.format(module=module)],
+                capture_output=True,
+                text=True,
+                env=env,
+                cwd=workdir,
+                check=True
+            )
+
+            best = min(best, float(result.stdout.strip().splitlines()[-1]))
+
+    return best
+
+
+if __name__ == "__main__":
+
+    for module in sys.argv[1:] or MODULES:
+        print(f"{module:>24} | import {import_time(module) * 1000:8.1f} ms")
@@ -0,0 +1,85 @@
+import sys
+import time
+import random
+
+import numpy as np
+import pandas as pd
+
+from core.assignment_engine import score_pilot, score_pilots
+
+
+# ===============================
+# SCORING BENCHMARK
+# ===============================
+# Row-wise DataFrame.apply(score_pilot) vs the columnar score_pilots.
+# Usage: python -m benchmarks.bench_scoring [pilot counts...]
+
+LOCATIONS = ["Bangalore", "Mumbai", "Delhi", "Pune", "Hyderabad"]
+SKILLS = ["Mapping", "Survey", "Inspection", "Thermal", "LiDAR"]
+STATUSES = ["Available", "Assigned", "On Leave"]
+
+MISSION = pd.Series({
+    "project_id": "PRJ001",
+    "required_skills": "Mapping",
+    "location": "Bangalore",
+    "start_date": pd.Timestamp("2026-02-06"),
+    "end_date": pd.Timestamp("2026-02-08"),
+    "duration_days": 3,
+    "mission_budget_inr": 12000,
+    "weather_forecast": "Sunny"
+})
+
+
+def make_pilots(count, seed=7):
+
+    rng = random.Random(seed)
+
+    return pd.DataFrame({
+        "pilot_id": [f"P{i:06d}" for i in range(count)],
+        "name": [f"Pilot {i}" for i in range(count)],
+        "skills": [", ".join(rng.sample(SKILLS, 2)) for _ in range(count)],
+        "location": [rng.choice(LOCATIONS) for _ in range(count)],
+        "status": [rng.choice(STATUSES) for _ in range(count)],
+        "current_assignment": ["" for _ in range(count)],
+        "daily_rate_inr": [rng.randint(1, 8) * 500 for _ in range(count)]
+    })
+
+
+def timed(fn, repeat=3):
+
+    best = float("inf")
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def run(count):
+
+    pilots = make_pilots(count)
+
+    row_time, row_scores = timed(
+        lambda: pilots.apply(lambda pilot: score_pilot(pilot, MISSION), axis=1)
+    )
+
+    col_time, col_scores = timed(lambda: score_pilots(pilots, MISSION))
+
+    assert np.allclose(row_scores.to_numpy(), col_scores.to_numpy())
+
+    print(
+        f"{count:>8} pilots | apply {row_time * 1000:9.1f} ms | "
+        f"vectorized {col_time * 1000:7.2f} ms | "
+        f"speedup {row_time / col_time:7.1f}x"
+    )
+
+
+if __name__ == "__main__":
+
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000]
+
+    for count in counts:
+        run(count)
@@ -1,5 +1,17 @@
-from core.sheets_service import get_pilots, get_drones, get_missions
-from datetime import datetime
+from core.sheets_service import (
+    get_pilots,
+    get_drones,
+    get_fleet_snapshot
+)
+from core.fleet_index import (
+    intersect,
+    split_tokens,
+    parse_requirement,
+    meets_requirement,
+    EMPTY_POSITIONS
+)
+import numpy as np
+import pandas as pd
 import logging
 
 
@@ -7,14 +19,22 @@ import logging
 # COST CALCULATION
 # ===============================
 
+def mission_duration_days(mission_row):
+
+    # Precomputed by the data layer when the missions table is loaded
+    days = mission_row["duration_days"]
+
+    if pd.isna(days):
+        raise ValueError(f"Invalid dates for mission {mission_row['project_id']}")
+
+    return int(days)
+
+
 def calculate_pilot_cost(pilot_row, mission_row):
 
     try:
 
-        start = datetime.strptime(mission_row["start_date"], "%Y-%m-%d")
-        end = datetime.strptime(mission_row["end_date"], "%Y-%m-%d")
-
-        days = (end - start).days + 1
+        days = mission_duration_days(mission_row)
 
         daily_rate = pilot_row["daily_rate_inr"]
 
@@ -38,7 +58,10 @@ def score_pilot(pilot_row, mission_row):
     try:
 
         # Skill match
-        if mission_row["required_skills"].lower() in str(pilot_row["skills"]).lower():
+        if meets_requirement(
+            set(split_tokens(pilot_row["skills"])),
+            parse_requirement(mission_row["required_skills"])
+        ):
             score += 50
 
         # Location match
@@ -62,82 +85,173 @@ def score_pilot(pilot_row, mission_row):
 
 
 # ===============================
-# FIND BEST PILOTS
+# VECTORIZED PILOT SCORING
 # ===============================
+# Same rules as score_pilot, evaluated column-wise over a whole
+# candidate frame with the mission duration read once.
+
+def score_pilots(pilots, mission_row):
+
+    if pilots.empty:
+        return pd.Series(dtype=float, index=pilots.index)
+
+    required = parse_requirement(mission_row["required_skills"])
 
-def find_best_pilots(mission_row):
+    # Rosters repeat a handful of skill strings, test each distinct one once
+    codes, distinct = pd.factorize(pilots["skills"].astype(str))
+
+    skill_match = np.array(
+        [meets_requirement(set(split_tokens(skills)), required) for skills in distinct],
+        dtype=bool
+    )[codes]
+
+    location_match = (pilots["location"] == mission_row["location"]).to_numpy()
+
+    available = (pilots["status"] == "Available").to_numpy()
+
+    score = (
+        np.where(skill_match, 50, 0) +
+        np.where(location_match, 30, 0) +
+        np.where(available, 20, 0)
+    )
 
     try:
 
-        pilots = get_pilots()
+        days = mission_duration_days(mission_row)
 
-        if pilots.empty:
+    except Exception as e:
 
-            logging.warning("Pilot database empty")
+        logging.error(f"Cost calculation error: {e}")
 
-            return pilots
+        return pd.Series(-np.inf, index=pilots.index)
 
-        # STRICT FILTER: available pilots
-        filtered = pilots[
-            (pilots["status"] == "Available") &
-            (pilots["skills"].str.contains(
-                mission_row["required_skills"],
-                case=False,
-                na=False
-            )) &
-            (pilots["location"] == mission_row["location"])
-        ]
+    # Non-numeric rates carry no penalty, as in score_pilot
+    rates = pd.to_numeric(pilots["daily_rate_inr"], errors="coerce").to_numpy(
+        dtype=float
+    )
 
-        # FALLBACK: suggest best unavailable pilots
-        if filtered.empty:
+    penalty = np.nan_to_num(days * rates / 1000, nan=0.0)
 
-            logging.warning("No available pilots. Using fallback suggestion.")
+    return pd.Series(score - penalty, index=pilots.index)
 
-            fallback = pilots[
-                (pilots["skills"].str.contains(
-                    mission_row["required_skills"],
-                    case=False,
-                    na=False
-                )) &
-                (pilots["location"] == mission_row["location"])
-            ]
 
-            if fallback.empty:
+# ===============================
+# FIND BEST PILOTS
+# ===============================
+# Candidates are pilots in the mission location holding every required
+# skill and certification, answered from the per-pilot bitsets.
+# Candidate sets and rankings are memoized on the table snapshot, so
+# identical (location, skills, certs, duration) requests are answered
+# from memory. A refresh only drops the entries for locations whose
+# rows changed.
 
-                logging.warning("No fallback pilots found")
+def mission_requirements(mission_row):
 
-                return fallback
+    return (
+        parse_requirement(mission_row["required_skills"]),
+        parse_requirement(mission_row.get("required_certs"))
+    )
 
-            fallback = fallback.copy()
 
-            fallback["score"] = fallback.apply(
-                lambda pilot: score_pilot(pilot, mission_row),
-                axis=1
-            )
+def skilled_pilot_positions(index, mission_row):
 
-            fallback = fallback.sort_values(
-                by="score",
-                ascending=False
-            )
+    location = mission_row["location"]
+    skills, certs = mission_requirements(mission_row)
 
-            return fallback
+    # Candidates come from the location bucket only
+    return index.memo(
+        ("skilled", location, skills, certs),
+        lambda: intersect(
+            index.positions("location", location),
+            index.requirement_positions("skills", skills),
+            index.requirement_positions("certifications", certs)
+        ),
+        depends_on=("location", location)
+    )
 
-        # NORMAL SCORING
-        filtered = filtered.copy()
 
-        filtered["score"] = filtered.apply(
-            lambda pilot: score_pilot(pilot, mission_row),
-            axis=1
-        )
+def duration_key(mission_row):
+
+    days = mission_row["duration_days"]
+
+    return None if pd.isna(days) else int(days)
+
+
+def rank_pilots(index, mission_row):
+
+    skilled = skilled_pilot_positions(index, mission_row)
+
+    # STRICT FILTER: available pilots
+    filtered = index.select(
+        intersect(skilled, index.positions("status", "Available"))
+    )
+
+    # FALLBACK: suggest best unavailable pilots
+    if filtered.empty:
+
+        logging.warning("No available pilots. Using fallback suggestion.")
+
+        fallback = index.select(skilled)
+
+        if fallback.empty:
+
+            logging.warning("No fallback pilots found")
+
+            return fallback
 
-        filtered = filtered.sort_values(
+        fallback["score"] = score_pilots(fallback, mission_row)
+
+        fallback = fallback.sort_values(
             by="score",
             ascending=False
         )
 
-        logging.info("Available pilots ranked successfully")
+        return fallback
+
+    # NORMAL SCORING
+    filtered["score"] = score_pilots(filtered, mission_row)
+
+    filtered = filtered.sort_values(
+        by="score",
+        ascending=False
+    )
+
+    logging.info("Available pilots ranked successfully")
+
+    return filtered
+
+
+def find_best_pilots(mission_row, snapshot=None):
+
+    try:
+
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
 
-        return filtered
+        index = snapshot.pilots
+
+        pilots = index.df
+
+        if pilots.empty:
+
+            logging.warning("Pilot database empty")
+
+            return pilots
+
+        key = (
+            "ranked",
+            mission_row["location"],
+            *mission_requirements(mission_row),
+            duration_key(mission_row)
+        )
+
+        ranked = index.memo(
+            key,
+            lambda: rank_pilots(index, mission_row),
+            depends_on=("location", mission_row["location"])
+        )
+
+        return ranked.copy(deep=False)
 
     except Exception as e:
 
@@ -150,35 +264,58 @@ def find_best_pilots(mission_row):
 # FIND AVAILABLE DRONES
 # ===============================
 
-def find_available_drones(location, weather):
+def rain_capable_positions(index):
+
+    def build():
+
+        if "weather_resistance" not in index.df.columns:
+            return EMPTY_POSITIONS
+
+        return np.flatnonzero(
+            index.df["weather_resistance"].str.contains(
+                "IP43",
+                na=False
+            ).to_numpy(dtype=bool)
+        )
+
+    return index.memo("rain_capable", build)
+
+
+def find_available_drones(location, weather, snapshot=None):
 
     try:
 
-        drones = get_drones()
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
+
+        index = snapshot.drones
 
-        if drones.empty:
+        if index.df.empty:
 
             logging.warning("Drone database empty")
 
-            return drones
+            return index.df
 
-        filtered = drones[
-            (drones["status"] == "Available") &
-            (drones["location"] == location)
-        ]
+        rainy = weather.lower() == "rainy"
 
-        if weather.lower() == "rainy":
+        def build():
 
-            filtered = filtered[
-                filtered["weather_resistance"].str.contains(
-                    "IP43",
-                    na=False
-                )
-            ]
+            positions = index.lookup(status="Available", location=location)
 
-        logging.info("Drone filtering complete")
+            if rainy:
+                positions = intersect(positions, rain_capable_positions(index))
 
-        return filtered
+            logging.info("Drone filtering complete")
+
+            return index.select(positions)
+
+        filtered = index.memo(
+            ("available", location, rainy),
+            build,
+            depends_on=("location", location)
+        )
+
+        return filtered.copy(deep=False)
 
     except Exception as e:
 
@@ -191,33 +328,36 @@ def find_available_drones(location, weather):
 # MAIN MATCHING FUNCTION
 # ===============================
 
-def match_resources(project_id):
+def match_resources(project_id, snapshot=None):
 
     try:
 
-        missions = get_missions()
+        # One consistent view for the whole match
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
 
-        if missions.empty:
+        missions = snapshot.missions
+
+        if missions.df.empty:
 
             logging.error("Mission database empty")
 
             return "Mission database empty"
 
-        mission = missions[missions["project_id"] == project_id]
+        mission = missions.get(project_id)
 
-        if mission.empty:
+        if mission is None:
 
             logging.error(f"Mission {project_id} not found")
 
             return "Mission not found"
 
-        mission = mission.iloc[0]
-
-        pilots = find_best_pilots(mission)
+        pilots = find_best_pilots(mission, snapshot)
 
         drones = find_available_drones(
             mission["location"],
-            mission["weather_forecast"]
+            mission["weather_forecast"],
+            snapshot
         )
 
         logging.info(f"Resource matching completed for {project_id}")
@@ -0,0 +1,62 @@
+import asyncio
+import functools
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from core.data_backends import TABLES
+from core.sheets_service import roster_cache, get_table_index
+
+
+# ===============================
+# ASYNC DATA ACCESS
+# ===============================
+# Blocking backend fetches run on a small dedicated executor so they can
+# never exhaust the request threadpool. Concurrent requests that need the
+# same table while it is being fetched await one shared in-flight task.
+
+DATA_EXECUTOR_WORKERS = int(os.environ.get("DATA_EXECUTOR_WORKERS", "4"))
+
+executor = ThreadPoolExecutor(
+    max_workers=DATA_EXECUTOR_WORKERS,
+    thread_name_prefix="fleet-data"
+)
+
+_inflight = {}
+
+
+async def run_blocking(fn, *args, **kwargs):
+
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(
+        executor,
+        functools.partial(fn, *args, **kwargs)
+    )
+
+
+async def load_table(table):
+
+    # Warm cache: answered from memory, no executor hop
+    if roster_cache.is_ready(table):
+        return get_table_index(table)
+
+    task = _inflight.get(table)
+
+    if task is None:
+
+        logging.info(f"Async fetch started for {table}")
+
+        task = asyncio.ensure_future(run_blocking(get_table_index, table))
+
+        _inflight[table] = task
+
+        task.add_done_callback(lambda _: _inflight.pop(table, None))
+
+    # Shield so one cancelled request does not cancel the shared fetch
+    return await asyncio.shield(task)
+
+
+async def ensure_tables(*tables):
+
+    await asyncio.gather(*(load_table(table) for table in tables or TABLES))
@@ -0,0 +1,294 @@
+from core.sheets_service import get_fleet_snapshot
+from core.assignment_engine import skilled_pilot_positions, score_pilots
+from core.conflict_detector import pilot_conflicts_bulk, drone_conflicts_bulk
+from core.fleet_index import EMPTY_POSITIONS
+import numpy as np
+import logging
+
+
+# ===============================
+# BATCH ASSIGNMENT SOLVER
+# ===============================
+# Assigns pilots and drones to a set of missions at once, minimising
+# the total cost globally with the Hungarian algorithm:
+#   pilot cost  = -score_pilot, only for skilled local pilots with no
+#                 double-booking or budget conflict; available pilots
+#                 when the mission has any, otherwise the unavailable
+#                 ones, the same fallback as find_best_pilots
+#   drone cost  = 0, only for available local drones with no
+#                 double-booking, maintenance or weather conflict
+# Infeasible pairs get INFEASIBLE_COST so any feasible assignment is
+# preferred over leaving a mission unassigned.
+#
+# A mission is only assigned with both a pilot and a drone: missions
+# that win one but not the other are dropped from the round and the
+# rest solved again, so they do not hold a resource another mission
+# could use. Missions left over get further rounds in which resources
+# already given to batch missions are offered again, unless their
+# windows overlap, so one drone can cover consecutive missions.
+
+INFEASIBLE_COST = 1e9
+
+
+def solve(cost):
+
+    if cost.size == 0:
+        return {}
+
+    # scipy.optimize costs ~0.5s to import, pay it on first solve only
+    from scipy.optimize import linear_sum_assignment
+
+    rows, cols = linear_sum_assignment(cost)
+
+    return {
+        col: row
+        for row, col in zip(rows, cols)
+        if cost[row, col] < INFEASIBLE_COST
+    }
+
+
+def mission_overlaps(missions):
+
+    # overlaps[i, j]: windows of missions i and j overlap. Missions
+    # without valid dates overlap everything.
+    starts = np.array([m["start_date"] for m in missions], dtype="datetime64[ns]")
+    ends = np.array([m["end_date"] for m in missions], dtype="datetime64[ns]")
+
+    invalid = np.isnat(starts) | np.isnat(ends)
+
+    overlaps = (starts[:, None] <= ends[None, :]) & (starts[None, :] <= ends[:, None])
+
+    return overlaps | invalid[:, None] | invalid[None, :]
+
+
+def solve_pairs(pilot_cost, drone_cost):
+
+    # Pilot and drone per column, only for columns that get both
+    active = np.ones(pilot_cost.shape[1], dtype=bool)
+
+    while True:
+
+        usable = (
+            active
+            & (pilot_cost < INFEASIBLE_COST).any(axis=0)
+            & (drone_cost < INFEASIBLE_COST).any(axis=0)
+        )
+
+        pilot_choice = solve(np.where(usable, pilot_cost, INFEASIBLE_COST))
+        drone_choice = solve(np.where(usable, drone_cost, INFEASIBLE_COST))
+
+        unpaired = set(pilot_choice) ^ set(drone_choice)
+
+        if not unpaired:
+            return pilot_choice, drone_choice
+
+        active[list(unpaired)] = False
+
+
+def assign_rounds(pilot_cost, drone_cost, overlaps):
+
+    # {column: row} for pilots and drones over as many rounds as assign
+    # something; a resource is reused only for non-overlapping missions
+    pilot_of = {}
+    drone_of = {}
+
+    pending = list(range(pilot_cost.shape[1]))
+
+    while pending:
+
+        pilots = pilot_cost[:, pending].copy()
+        drones = drone_cost[:, pending].copy()
+
+        for col, row in pilot_of.items():
+            pilots[row, overlaps[col, pending]] = INFEASIBLE_COST
+
+        for col, row in drone_of.items():
+            drones[row, overlaps[col, pending]] = INFEASIBLE_COST
+
+        pilot_choice, drone_choice = solve_pairs(pilots, drones)
+
+        if not pilot_choice:
+            break
+
+        for local, row in pilot_choice.items():
+
+            pilot_of[pending[local]] = row
+            drone_of[pending[local]] = drone_choice[local]
+
+        pending = [col for col in pending if col not in pilot_of]
+
+    return pilot_of, drone_of
+
+
+def unassigned_reason(col, pilot_cost, drone_cost):
+
+    if not (pilot_cost[:, col] < INFEASIBLE_COST).any():
+        return "No conflict-free pilot available"
+
+    if not (drone_cost[:, col] < INFEASIBLE_COST).any():
+        return "No conflict-free drone available"
+
+    return "Conflict-free pilots and drones went to overlapping missions in this batch"
+
+
+def pilot_cost_matrix(missions, snapshot):
+
+    index = snapshot.pilots
+
+    if index.df.empty:
+        return index.df, np.empty((0, len(missions)))
+
+    available = index.positions("status", "Available")
+
+    candidates = []
+
+    for mission in missions:
+
+        skilled = skilled_pilot_positions(index, mission)
+
+        positions = np.intersect1d(skilled, available, assume_unique=True)
+
+        # Fall back to unavailable skilled pilots, as rank_pilots does
+        candidates.append(positions if len(positions) else skilled)
+
+    union = np.unique(np.concatenate(candidates)) if candidates else EMPTY_POSITIONS
+
+    pilots = index.select(union)
+
+    cost = np.full((len(pilots), len(missions)), INFEASIBLE_COST)
+
+    for col, mission in enumerate(missions):
+
+        if len(candidates[col]) == 0:
+            continue
+
+        subset = index.select(candidates[col])
+
+        rows = np.searchsorted(union, candidates[col])
+
+        feasible = np.array(
+            [not c for c in pilot_conflicts_bulk(subset, mission, snapshot)],
+            dtype=bool
+        )
+
+        scores = score_pilots(subset, mission).to_numpy()
+
+        cost[rows[feasible], col] = -scores[feasible]
+
+    return pilots, cost
+
+
+def drone_cost_matrix(missions, snapshot):
+
+    index = snapshot.drones
+
+    if index.df.empty:
+        return index.df, np.empty((0, len(missions)))
+
+    candidates = [
+        index.lookup(status="Available", location=mission["location"])
+        for mission in missions
+    ]
+
+    union = np.unique(np.concatenate(candidates)) if candidates else EMPTY_POSITIONS
+
+    drones = index.select(union)
+
+    cost = np.full((len(drones), len(missions)), INFEASIBLE_COST)
+
+    for col, mission in enumerate(missions):
+
+        if len(candidates[col]) == 0:
+            continue
+
+        subset = index.select(candidates[col])
+
+        rows = np.searchsorted(union, candidates[col])
+
+        feasible = np.array(
+            [not c for c in drone_conflicts_bulk(subset, mission, snapshot)],
+            dtype=bool
+        )
+
+        cost[rows[feasible], col] = 0.0
+
+    return drones, cost
+
+
+def solve_batch_assignment(project_ids, snapshot=None):
+
+    try:
+
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
+
+        mission_index = snapshot.missions
+
+        results = {}
+        missions = []
+
+        for project_id in dict.fromkeys(project_ids):
+
+            mission = mission_index.get(project_id)
+
+            if mission is None:
+
+                results[project_id] = {
+                    "project_id": project_id,
+                    "status": "error",
+                    "message": "Mission not found"
+                }
+
+                continue
+
+            missions.append(mission)
+
+        pilots, pilot_cost = pilot_cost_matrix(missions, snapshot)
+        drones, drone_cost = drone_cost_matrix(missions, snapshot)
+
+        pilot_choice, drone_choice = assign_rounds(
+            pilot_cost,
+            drone_cost,
+            mission_overlaps(missions)
+        )
+
+        for col, mission in enumerate(missions):
+
+            project_id = mission["project_id"]
+
+            if col not in pilot_choice:
+
+                results[project_id] = {
+                    "project_id": project_id,
+                    "status": "error",
+                    "message": unassigned_reason(col, pilot_cost, drone_cost)
+                }
+
+                continue
+
+            pilot = pilots.iloc[pilot_choice[col]]
+            drone = drones.iloc[drone_choice[col]]
+
+            results[project_id] = {
+                "project_id": project_id,
+                "status": "success",
+                "pilot_id": pilot["pilot_id"],
+                "pilot_name": pilot["name"],
+                "drone_id": drone["drone_id"],
+                "drone_model": drone["model"],
+                "score": float(-pilot_cost[pilot_choice[col], col])
+            }
+
+        assigned = sum(r["status"] == "success" for r in results.values())
+
+        logging.info(
+            f"Batch assignment solved: {assigned}/{len(results)} missions"
+        )
+
+        return [results[project_id] for project_id in dict.fromkeys(project_ids)]
+
+    except Exception as e:
+
+        logging.error(f"Batch assignment error: {e}")
+
+        return "Batch assignment failed"
@@ -0,0 +1,90 @@
+import threading
+from collections import deque
+
+from core.fleet_index import diff_indexes
+
+
+# ===============================
+# TABLE CHANGE LOG
+# ===============================
+# Remembers which primary keys changed between the last few snapshots
+# of a table, so a client holding version V can be sent only the rows
+# that changed since V instead of the whole table.
+#
+# Versions are table fingerprints (content hashes), not local counters,
+# so a version handed out by one worker is understood by every other
+# worker that has seen the same data. A version that is unknown or has
+# dropped out of the log is answered with a full resync.
+
+CHANGE_LOG_VERSIONS = 100
+
+
+class ChangeLog:
+
+
+    def __init__(self, max_versions=CHANGE_LOG_VERSIONS):
+
+        # (fingerprint, changed keys, deleted keys) oldest first
+        self.entries = deque(maxlen=max_versions)
+
+        self._index = None
+        self._lock = threading.Lock()
+
+
+    def record(self, index):
+
+        fingerprint = index.fingerprint()
+
+        with self._lock:
+
+            if self.entries and self.entries[-1][0] == fingerprint:
+                return
+
+            if self._index is None:
+
+                changed = frozenset()
+                deleted = frozenset()
+
+            else:
+
+                changes = index.changes
+
+                # Reuse the change set computed by the refresh when it was
+                # taken against the copy recorded last
+                if changes is None or index.base_fingerprint != self.entries[-1][0]:
+                    changes = diff_indexes(self._index, index)
+
+                changed = frozenset(changes.inserted) | frozenset(changes.updated)
+                deleted = frozenset(changes.deleted)
+
+            self.entries.append((fingerprint, changed, deleted))
+
+            self._index = index
+
+
+    def since(self, version, current):
+
+        # (changed, deleted) keys between two versions, None if either
+        # version is not in the log
+        with self._lock:
+
+            fingerprints = [entry[0] for entry in self.entries]
+
+            if version not in fingerprints or current not in fingerprints:
+                return None
+
+            start = len(fingerprints) - 1 - fingerprints[::-1].index(version)
+            end = len(fingerprints) - 1 - fingerprints[::-1].index(current)
+
+            if end < start:
+                return None
+
+            changed = set()
+            deleted = set()
+
+            for _, entry_changed, entry_deleted in list(self.entries)[start + 1:end + 1]:
+
+                changed = (changed - entry_deleted) | entry_changed
+                deleted = (deleted - entry_changed) | entry_deleted
+
+            return changed, deleted
@@ -1,6 +1,7 @@
-from core.sheets_service import get_pilots, get_drones, get_missions
+from core.sheets_service import get_fleet_snapshot
 from core.assignment_engine import calculate_pilot_cost
-from datetime import datetime
+import numpy as np
+import pandas as pd
 import logging
 
 
@@ -8,48 +9,46 @@ import logging
 # DATE OVERLAP CHECK
 # ===============================
 
-def dates_overlap(start1, end1, start2, end2):
+def mission_window(mission_row):
 
-    return start1 <= end2 and start2 <= end1
+    start = mission_row["start_date"]
+    end = mission_row["end_date"]
 
+    if pd.isna(start) or pd.isna(end):
+        raise ValueError(f"Invalid dates for mission {mission_row['project_id']}")
 
-# ===============================
-# PILOT DOUBLE BOOKING CHECK
-# ===============================
+    return start, end
 
-def check_pilot_double_booking(pilot_row, mission_row):
 
-    try:
+def has_booking_overlap(bookings, resource_id, mission_row):
 
-        if pilot_row["current_assignment"] == "":
-            return None
+    if resource_id in bookings.invalid:
+        raise ValueError(f"Invalid booked mission dates for {resource_id}")
 
-        missions = get_missions()
+    if not bookings.bookings(resource_id):
+        return False
 
-        assigned_mission = missions[
-            missions["project_id"] == pilot_row["current_assignment"]
-        ]
+    start, end = mission_window(mission_row)
 
-        if assigned_mission.empty:
-            return None
+    return bookings.has_overlap(resource_id, start, end)
 
-        assigned_mission = assigned_mission.iloc[0]
 
-        start1 = datetime.strptime(
-            mission_row["start_date"], "%Y-%m-%d"
-        )
-        end1 = datetime.strptime(
-            mission_row["end_date"], "%Y-%m-%d"
-        )
+# ===============================
+# PILOT DOUBLE BOOKING CHECK
+# ===============================
 
-        start2 = datetime.strptime(
-            assigned_mission["start_date"], "%Y-%m-%d"
-        )
-        end2 = datetime.strptime(
-            assigned_mission["end_date"], "%Y-%m-%d"
-        )
+def check_pilot_double_booking(pilot_row, mission_row, snapshot=None):
+
+    try:
+
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
 
-        if dates_overlap(start1, end1, start2, end2):
+        if has_booking_overlap(
+            snapshot.pilot_bookings(),
+            pilot_row["pilot_id"],
+            mission_row
+        ):
 
             return "Pilot double-booked during mission dates"
 
@@ -66,39 +65,18 @@ def check_pilot_double_booking(pilot_row, mission_row):
 # DRONE DOUBLE BOOKING CHECK
 # ===============================
 
-def check_drone_double_booking(drone_row, mission_row):
+def check_drone_double_booking(drone_row, mission_row, snapshot=None):
 
     try:
 
-        if drone_row["current_assignment"] == "":
-            return None
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
 
-        missions = get_missions()
-
-        assigned_mission = missions[
-            missions["project_id"] == drone_row["current_assignment"]
-        ]
-
-        if assigned_mission.empty:
-            return None
-
-        assigned_mission = assigned_mission.iloc[0]
-
-        start1 = datetime.strptime(
-            mission_row["start_date"], "%Y-%m-%d"
-        )
-        end1 = datetime.strptime(
-            mission_row["end_date"], "%Y-%m-%d"
-        )
-
-        start2 = datetime.strptime(
-            assigned_mission["start_date"], "%Y-%m-%d"
-        )
-        end2 = datetime.strptime(
-            assigned_mission["end_date"], "%Y-%m-%d"
-        )
-
-        if dates_overlap(start1, end1, start2, end2):
+        if has_booking_overlap(
+            snapshot.drone_bookings(),
+            drone_row["drone_id"],
+            mission_row
+        ):
 
             return "Drone double-booked during mission dates"
 
@@ -115,6 +93,16 @@ def check_drone_double_booking(drone_row, mission_row):
 # BUDGET CHECK
 # ===============================
 
+def is_amount(value):
+
+    # Blank or text rates and budgets cannot be compared
+    return (
+        isinstance(value, (int, float, np.integer, np.floating))
+        and not isinstance(value, (bool, np.bool_))
+        and not pd.isna(value)
+    )
+
+
 def check_budget(pilot_row, mission_row):
 
     try:
@@ -123,6 +111,9 @@ def check_budget(pilot_row, mission_row):
 
         budget = mission_row["mission_budget_inr"]
 
+        if not is_amount(budget) or pd.isna(cost):
+            raise ValueError(f"Invalid rate or budget ({cost}, {budget})")
+
         if cost > budget:
 
             return f"Pilot cost exceeds mission budget ({cost} > {budget})"
@@ -144,11 +135,12 @@ def check_drone_maintenance(drone_row):
 
     try:
 
-        maintenance_due = datetime.strptime(
-            drone_row["maintenance_due"], "%Y-%m-%d"
-        )
+        maintenance_due = drone_row["maintenance_due"]
 
-        today = datetime.today()
+        if pd.isna(maintenance_due):
+            raise ValueError(f"Invalid maintenance date for {drone_row['drone_id']}")
+
+        today = pd.Timestamp.today()
 
         if maintenance_due <= today:
 
@@ -190,22 +182,30 @@ def check_weather(drone_row, mission_row):
 # MAIN CONFLICT DETECTOR
 # ===============================
 
-def detect_conflicts(project_id, pilot_id, drone_id):
+def detect_conflicts(project_id, pilot_id, drone_id, snapshot=None):
 
     try:
 
-        pilots = get_pilots()
-        drones = get_drones()
-        missions = get_missions()
+        # Every check below reads the same point-in-time view
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
+
+        pilot = snapshot.pilot(pilot_id)
+        drone = snapshot.drone(drone_id)
+        mission = snapshot.mission(project_id)
 
-        pilot = pilots[pilots["pilot_id"] == pilot_id].iloc[0]
-        drone = drones[drones["drone_id"] == drone_id].iloc[0]
-        mission = missions[missions["project_id"] == project_id].iloc[0]
+        if pilot is None or drone is None or mission is None:
+
+            logging.error(
+                f"Unknown resource: {project_id}, {pilot_id}, {drone_id}"
+            )
+
+            return "Conflict detection failed"
 
         conflicts = []
 
         # Pilot checks
-        conflict = check_pilot_double_booking(pilot, mission)
+        conflict = check_pilot_double_booking(pilot, mission, snapshot)
         if conflict:
             conflicts.append(conflict)
 
@@ -214,7 +214,7 @@ def detect_conflicts(project_id, pilot_id, drone_id):
             conflicts.append(conflict)
 
         # Drone checks
-        conflict = check_drone_double_booking(drone, mission)
+        conflict = check_drone_double_booking(drone, mission, snapshot)
         if conflict:
             conflicts.append(conflict)
 
@@ -241,3 +241,235 @@ def detect_conflicts(project_id, pilot_id, drone_id):
         logging.error(f"Conflict detection failed: {e}")
 
         return "Conflict detection failed"
+
+
+# ===============================
+# BULK CONFLICT DETECTION
+# ===============================
+# Same checks as detect_conflicts for every (pilot, drone) pair of a
+# mission. Pilot and drone checks are evaluated once per resource over
+# whole columns and then combined into the pair table.
+
+def select_rows(index, ids):
+
+    positions = [index.keys.get(resource_id) for resource_id in ids]
+
+    found = np.array([pos is not None for pos in positions], dtype=bool)
+
+    rows = index.select([pos for pos in positions if pos is not None])
+
+    return rows, found
+
+
+def booking_conflicts(bookings, resource_ids, mission_row, label):
+
+    result = [None] * len(resource_ids)
+
+    booked = [
+        row
+        for row, resource_id in enumerate(resource_ids)
+        if resource_id in bookings.starts or resource_id in bookings.invalid
+    ]
+
+    if not booked:
+        return result
+
+    try:
+
+        start, end = mission_window(mission_row)
+
+    except Exception:
+
+        for row in booked:
+            result[row] = f"{label} booking check failed"
+
+        return result
+
+    overlaps = bookings.has_overlap_many(
+        [resource_ids[row] for row in booked],
+        start,
+        end
+    )
+
+    for row, overlap in zip(booked, overlaps):
+
+        if resource_ids[row] in bookings.invalid:
+            result[row] = f"{label} booking check failed"
+        elif overlap:
+            result[row] = f"{label} double-booked during mission dates"
+
+    return result
+
+
+def pilot_conflicts_bulk(pilots, mission_row, snapshot=None):
+
+    if snapshot is None:
+        snapshot = get_fleet_snapshot()
+
+    conflicts = [[] for _ in range(len(pilots))]
+
+    # Double booking
+    for row, conflict in enumerate(booking_conflicts(
+        snapshot.pilot_bookings(),
+        pilots["pilot_id"].tolist(),
+        mission_row,
+        "Pilot"
+    )):
+
+        if conflict:
+            conflicts[row].append(conflict)
+
+    # Budget, same outcome per row as check_budget
+    budget = mission_row["mission_budget_inr"]
+
+    raw_rates = pilots["daily_rate_inr"].tolist()
+
+    days = float("inf")
+
+    if not is_amount(budget):
+
+        failed = np.ones(len(pilots), dtype=bool)
+        over_budget = np.zeros(len(pilots), dtype=bool)
+
+    else:
+
+        failed = np.array([not is_amount(rate) for rate in raw_rates], dtype=bool)
+
+        if pd.isna(mission_row["duration_days"]):
+
+            over_budget = ~failed
+
+        else:
+
+            days = int(mission_row["duration_days"])
+
+            rates = np.array(
+                [0 if bad else rate for rate, bad in zip(raw_rates, failed)],
+                dtype=float
+            )
+
+            over_budget = ~failed & (days * rates > budget)
+
+    for row in np.flatnonzero(failed):
+        conflicts[row].append("Budget check failed")
+
+    for row in np.flatnonzero(over_budget):
+
+        cost = days * raw_rates[row] if days != float("inf") else days
+
+        conflicts[row].append(
+            f"Pilot cost exceeds mission budget ({cost} > {budget})"
+        )
+
+    return conflicts
+
+
+def drone_conflicts_bulk(drones, mission_row, snapshot=None):
+
+    if snapshot is None:
+        snapshot = get_fleet_snapshot()
+
+    conflicts = [[] for _ in range(len(drones))]
+
+    # Double booking
+    for row, conflict in enumerate(booking_conflicts(
+        snapshot.drone_bookings(),
+        drones["drone_id"].tolist(),
+        mission_row,
+        "Drone"
+    )):
+
+        if conflict:
+            conflicts[row].append(conflict)
+
+    # Maintenance
+    due = drones["maintenance_due"]
+
+    invalid = due.isna().to_numpy()
+    overdue = ~invalid & (due <= pd.Timestamp.today()).to_numpy()
+
+    # Weather
+    if str(mission_row["weather_forecast"]).lower() == "rainy":
+
+        not_sealed = ~drones["weather_resistance"].astype(str).str.contains(
+            "IP43",
+            regex=False
+        ).to_numpy()
+
+    else:
+
+        not_sealed = np.zeros(len(drones), dtype=bool)
+
+    for row in range(len(drones)):
+
+        if invalid[row]:
+            conflicts[row].append("Maintenance check failed")
+        elif overdue[row]:
+            conflicts[row].append("Drone requires maintenance")
+
+        if not_sealed[row]:
+            conflicts[row].append("Drone not compatible with rainy weather")
+
+    return conflicts
+
+
+def detect_conflicts_bulk(project_id, pilot_ids, drone_ids, snapshot=None):
+
+    try:
+
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
+
+        mission = snapshot.mission(project_id)
+
+        if mission is None:
+
+            logging.error(f"Mission {project_id} not found")
+
+            return "Mission not found"
+
+        pilot_ids = list(pilot_ids)
+        drone_ids = list(drone_ids)
+
+        pilots, pilots_found = select_rows(snapshot.pilots, pilot_ids)
+        drones, drones_found = select_rows(snapshot.drones, drone_ids)
+
+        pilot_results = iter(pilot_conflicts_bulk(pilots, mission, snapshot))
+        drone_results = iter(drone_conflicts_bulk(drones, mission, snapshot))
+
+        pilot_conflicts = [
+            next(pilot_results) if found else ["Pilot not found"]
+            for found in pilots_found
+        ]
+
+        drone_conflicts = [
+            next(drone_results) if found else ["Drone not found"]
+            for found in drones_found
+        ]
+
+        rows = [
+            {
+                "pilot_id": pilot_id,
+                "drone_id": drone_id,
+                "conflicts": pilot_conflict + drone_conflict,
+                "conflict_free": not (pilot_conflict or drone_conflict)
+            }
+            for pilot_id, pilot_conflict in zip(pilot_ids, pilot_conflicts)
+            for drone_id, drone_conflict in zip(drone_ids, drone_conflicts)
+        ]
+
+        logging.info(
+            f"Bulk conflict check for {project_id}: "
+            f"{len(pilot_ids)} pilots x {len(drone_ids)} drones"
+        )
+
+        return pd.DataFrame(
+            rows,
+            columns=["pilot_id", "drone_id", "conflicts", "conflict_free"]
+        )
+
+    except Exception as e:
+
+        logging.error(f"Bulk conflict detection failed: {e}")
+
+        return "Conflict detection failed"
@@ -0,0 +1,719 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+import pandas as pd
+
+
+# ===============================
+# TABLE NAMES
+# ===============================
+
+PILOTS_TABLE = "pilot_roster"
+DRONES_TABLE = "drone_fleet"
+MISSIONS_TABLE = "missions"
+
+TABLES = (PILOTS_TABLE, DRONES_TABLE, MISSIONS_TABLE)
+
+
+# ===============================
+# WRITE PRECONDITIONS
+# ===============================
+# commit() takes [(table, key_column, updates, expected)] where expected
+# is {key: {column: value}}: the values the caller read before deciding
+# on the write. The write only goes through when the stored row still
+# holds them (compare-and-set), otherwise the whole commit fails with
+# StaleRowError carrying the stored values so the caller can redo it.
+
+class StaleRowError(Exception):
+
+
+    def __init__(self, table, key, current):
+
+        super().__init__(f"{table}: row {key} changed since it was read")
+
+        self.table = table
+        self.key = key
+        self.current = current
+
+
+def cell_text(value):
+
+    # Blank cells read back as "", NULL or NaN depending on the backend
+    if value is None or value != value:
+        return ""
+
+    return str(value)
+
+
+def check_expected(table, expected, current):
+
+    # current is {key: {column: stored value}}
+    for key, fields in expected.items():
+
+        stored = current.get(key, {})
+
+        if any(
+            cell_text(stored.get(column)) != cell_text(value)
+            for column, value in fields.items()
+        ):
+            raise StaleRowError(
+                table,
+                key,
+                {column: stored.get(column) for column in fields}
+            )
+
+
+# ===============================
+# GOOGLE SHEETS BACKEND
+# ===============================
+
+class GoogleSheetsBackend:
+
+    name = "sheets"
+
+    # Subject to the Sheets API per-minute request quota
+    rate_limited = True
+
+    scope = [
+        "https://spreadsheets.google.com/feeds",
+        "https://www.googleapis.com/auth/drive"
+    ]
+
+
+    def __init__(self, sheet_url, credentials_json):
+
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
+
+        creds = ServiceAccountCredentials.from_json_keyfile_dict(
+            json.loads(credentials_json),
+            self.scope
+        )
+
+        client = gspread.authorize(creds)
+
+        self.spreadsheet = client.open_by_url(sheet_url)
+
+        self._worksheets = {}
+        self._headers = {}
+        self._records = {}
+
+
+    def _worksheet(self, table):
+
+        # Worksheet lookups cost a metadata request, resolve each once
+        if table not in self._worksheets:
+            self._worksheets[table] = self.spreadsheet.worksheet(table)
+
+        return self._worksheets[table]
+
+
+    def fetch_table(self, table):
+
+        return self.fetch_tables([table])[table]
+
+
+    def fetch_tables(self, tables):
+
+        from gspread.utils import fill_gaps, numericise_all
+
+        # One values.batchGet for every worksheet: a single round trip,
+        # and all tables are read at the same moment
+        response = self.spreadsheet.values_batch_get(
+            [f"'{table}'" for table in tables]
+        )
+
+        frames = {}
+
+        for table, value_range in zip(tables, response.get("valueRanges", [])):
+
+            rows = fill_gaps(value_range.get("values", []))
+
+            headers = rows[0] if rows else []
+
+            # Same conversion as worksheet.get_all_records()
+            records = [
+                dict(zip(headers, numericise_all(row)))
+                for row in rows[1:]
+            ]
+
+            # Remember the layout so writes can address cells directly
+            self._headers[table] = headers
+            self._records[table] = records
+
+            frames[table] = pd.DataFrame(records)
+
+        missing = set(tables) - set(frames)
+
+        if missing:
+            raise KeyError(f"Worksheets not returned: {sorted(missing)}")
+
+        return frames
+
+
+    def _row_numbers(self, table, key_column):
+
+        rows = {}
+
+        for i, record in enumerate(self._records.get(table, [])):
+
+            # Header is row 1, first record is row 2
+            rows.setdefault(record.get(key_column), i + 2)
+
+        return rows
+
+
+    def _read_cells(self, targets):
+
+        from gspread.utils import rowcol_to_a1, numericise_all
+
+        # [(table, columns, {key: row})] -> {table: {key: {column: value}}}
+        # in one values.batchGet, converted like fetch_tables does
+        ranges = []
+        cells = []
+
+        for table, columns, rows in targets:
+
+            headers = self._headers.get(table, [])
+
+            for key, row in rows.items():
+
+                for column in columns:
+
+                    if column in headers:
+
+                        ranges.append(
+                            f"'{table}'!{rowcol_to_a1(row, headers.index(column) + 1)}"
+                        )
+                        cells.append((table, key, column))
+
+        current = {table: {key: {} for key in rows} for table, _, rows in targets}
+
+        if not ranges:
+            return current
+
+        response = self.spreadsheet.values_batch_get(ranges)
+
+        for (table, key, column), value_range in zip(cells, response.get("valueRanges", [])):
+
+            values = value_range.get("values") or [[]]
+
+            current[table][key][column] = numericise_all(values[0][:1] or [""])[0]
+
+        return current
+
+
+    def _locate(self, changes, columns=None):
+
+        # Row number of every key in [(table, key_column, updates)], plus
+        # the current value of the key and of the extra columns asked for
+        columns = columns or {}
+
+        def rows_for(table, key_column, updates):
+
+            rows = self._row_numbers(table, key_column)
+
+            return {key: rows[key] for key in updates if key in rows}
+
+        located = {
+            table: rows_for(table, key_column, updates)
+            for table, key_column, updates in changes
+        }
+
+        read = {
+            table: [key_column, *columns.get(table, ())]
+            for table, key_column, updates in changes
+        }
+
+        stale = {
+            table
+            for table, key_column, updates in changes
+            if len(located[table]) < len(updates)
+        }
+
+        # Rows come from the last fetch and the sheet may have been
+        # sorted or edited since: confirm the key in every target row
+        current = self._read_cells([
+            (table, read[table], located[table])
+            for table, key_column, updates in changes
+            if table not in stale
+        ])
+
+        for table, key_column, updates in changes:
+
+            if table in current and any(
+                values.get(key_column) != key
+                for key, values in current[table].items()
+            ):
+                stale.add(table)
+
+        # Re-read the layout of every table that is missing a row or
+        # whose rows moved
+        if stale:
+
+            logging.warning(f"Sheet layout changed, re-reading {sorted(stale)}")
+
+            self.fetch_tables(sorted(stale))
+
+            for table, key_column, updates in changes:
+
+                if table in stale:
+
+                    located[table] = rows_for(table, key_column, updates)
+
+                    records = self._records[table]
+
+                    current[table] = {
+                        key: {column: records[row - 2].get(column) for column in read[table]}
+                        for key, row in located[table].items()
+                    }
+
+        return located, current
+
+
+    def _cells(self, table, key_column, updates, rows):
+
+        from gspread.utils import rowcol_to_a1
+
+        headers = self._headers[table]
+
+        cells = {}
+
+        for key, fields in updates.items():
+
+            if key not in rows:
+                continue
+
+            cells[key] = [
+                {
+                    "range": rowcol_to_a1(rows[key], headers.index(column) + 1),
+                    "values": [[value]]
+                }
+                for column, value in fields.items()
+            ]
+
+        return cells
+
+
+    def update_rows(self, table, key_column, updates):
+
+        rows = self._locate([(table, key_column, updates)])[0][table]
+
+        cells = self._cells(table, key_column, updates, rows)
+
+        # One request for every queued cell
+        if cells:
+            self._worksheet(table).batch_update(
+                [cell for key_cells in cells.values() for cell in key_cells],
+                raw=False
+            )
+
+        return set(cells)
+
+
+    def commit(self, changes):
+
+        data = []
+
+        located, current = self._locate(
+            [(table, key_column, updates) for table, key_column, updates, _ in changes],
+            {
+                table: {column for fields in expected.values() for column in fields}
+                for table, _, _, expected in changes
+            }
+        )
+
+        for table, key_column, updates, expected in changes:
+
+            cells = self._cells(table, key_column, updates, located[table])
+
+            missing = set(updates) - set(cells)
+
+            if missing:
+                raise KeyError(f"{table}: rows not found {sorted(missing)}")
+
+            check_expected(table, expected, current[table])
+
+            for key_cells in cells.values():
+
+                for cell in key_cells:
+
+                    data.append({
+                        "range": f"'{table}'!{cell['range']}",
+                        "values": cell["values"]
+                    })
+
+        # values.batchUpdate is applied all-or-nothing by the Sheets API,
+        # so every table changes in the same round trip or none does
+        if data:
+
+            self.spreadsheet.values_batch_update({
+                "valueInputOption": "USER_ENTERED",
+                "data": data
+            })
+
+
+# ===============================
+# SQLITE BACKEND
+# ===============================
+
+class SQLiteBackend:
+
+    name = "sqlite"
+
+    rate_limited = False
+
+
+    def __init__(self, path):
+
+        self.path = path
+
+
+    def _connect(self):
+
+        return sqlite3.connect(self.path)
+
+
+    def fetch_table(self, table):
+
+        return self.fetch_tables([table])[table]
+
+
+    def fetch_tables(self, tables):
+
+        frames = {}
+
+        conn = self._connect()
+
+        try:
+
+            # One read transaction, so the tables come from one state
+            conn.execute("BEGIN")
+
+            for table in tables:
+
+                df = pd.read_sql_query(f'SELECT * FROM "{table}"', conn)
+
+                # Sheets returns "" for blank cells, keep the same contract
+                frames[table] = df.astype(object).where(df.notna(), "")
+
+        finally:
+
+            conn.rollback()
+            conn.close()
+
+        return frames
+
+
+    def update_rows(self, table, key_column, updates):
+
+        applied = set()
+
+        # Single transaction for the whole batch
+        with self._connect() as conn:
+
+            for key, fields in updates.items():
+
+                assignments = ", ".join(f'"{column}" = ?' for column in fields)
+
+                cursor = conn.execute(
+                    f'UPDATE "{table}" SET {assignments} WHERE "{key_column}" = ?',
+                    (*fields.values(), key)
+                )
+
+                if cursor.rowcount > 0:
+                    applied.add(key)
+
+        return applied
+
+
+    def commit(self, changes):
+
+        # One transaction across tables, rolled back if any row is missing
+        # or no longer holds the expected values
+        with self._connect() as conn:
+
+            for table, key_column, updates, expected in changes:
+
+                for key, fields in updates.items():
+
+                    assignments = ", ".join(f'"{column}" = ?' for column in fields)
+
+                    conditions = expected.get(key, {})
+
+                    guards = "".join(
+                        f' AND COALESCE(CAST("{column}" AS TEXT), \'\') = ?'
+                        for column in conditions
+                    )
+
+                    cursor = conn.execute(
+                        f'UPDATE "{table}" SET {assignments} '
+                        f'WHERE "{key_column}" = ?{guards}',
+                        (
+                            *fields.values(),
+                            key,
+                            *(cell_text(value) for value in conditions.values())
+                        )
+                    )
+
+                    if cursor.rowcount > 0:
+                        continue
+
+                    if not conditions:
+                        raise KeyError(f"{table}: row not found {key}")
+
+                    columns = ", ".join(f'"{column}"' for column in conditions)
+
+                    row = conn.execute(
+                        f'SELECT {columns} FROM "{table}" WHERE "{key_column}" = ?',
+                        (key,)
+                    ).fetchone()
+
+                    if row is None:
+                        raise KeyError(f"{table}: row not found {key}")
+
+                    raise StaleRowError(table, key, dict(zip(conditions, row)))
+
+
+    def write_table(self, table, df, index_column=None):
+
+        with self._connect() as conn:
+
+            df.to_sql(table, conn, if_exists="replace", index=False)
+
+            if index_column:
+
+                conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{table}_{index_column}" '
+                    f'ON "{table}" ("{index_column}")'
+                )
+
+
+# ===============================
+# CSV / PARQUET DIRECTORY BACKEND
+# ===============================
+
+class FileBackend:
+
+    name = "files"
+
+    rate_limited = False
+
+
+    def __init__(self, directory, file_format="csv"):
+
+        if file_format not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported file format: {file_format}")
+
+        self.directory = directory
+        self.file_format = file_format
+
+
+    def _path(self, table):
+
+        return os.path.join(self.directory, f"{table}.{self.file_format}")
+
+
+    def fetch_table(self, table):
+
+        if self.file_format == "parquet":
+            return pd.read_parquet(self._path(table))
+
+        return pd.read_csv(self._path(table), keep_default_na=False)
+
+
+    def fetch_tables(self, tables):
+
+        return {table: self.fetch_table(table) for table in tables}
+
+
+    @staticmethod
+    def _apply(df, key_column, updates):
+
+        applied = set()
+
+        for key, fields in updates.items():
+
+            mask = df[key_column] == key
+
+            if not mask.any():
+                continue
+
+            for column, value in fields.items():
+
+                df[column] = df[column].astype(object)
+                df.loc[mask, column] = value
+
+            applied.add(key)
+
+        return applied
+
+
+    def update_rows(self, table, key_column, updates):
+
+        df = self.fetch_table(table)
+
+        applied = self._apply(df, key_column, updates)
+
+        # One rewrite of the file for the whole batch
+        if applied:
+            self.write_table(table, df)
+
+        return applied
+
+
+    def commit(self, changes):
+
+        originals = {}
+        frames = {}
+
+        for table, key_column, updates, expected in changes:
+
+            originals[table] = self.fetch_table(table)
+            frames[table] = originals[table].copy()
+
+            # Compare against the file as it is now, not the cached copy
+            rows = originals[table].drop_duplicates(key_column).set_index(key_column)
+
+            check_expected(
+                table,
+                {key: fields for key, fields in expected.items() if key in rows.index},
+                {
+                    key: rows.loc[key].to_dict()
+                    for key in expected
+                    if key in rows.index
+                }
+            )
+
+            missing = set(updates) - self._apply(frames[table], key_column, updates)
+
+            if missing:
+                raise KeyError(f"{table}: rows not found {sorted(missing)}")
+
+        written = []
+
+        try:
+
+            for table, df in frames.items():
+
+                self.write_table(table, df)
+
+                written.append(table)
+
+        except Exception:
+
+            # Put back every file already rewritten
+            for table in written:
+                self.write_table(table, originals[table])
+
+            raise
+
+
+    def write_table(self, table, df, index_column=None):
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        if self.file_format == "parquet":
+            df.to_parquet(self._path(table), index=False)
+        else:
+            df.to_csv(self._path(table), index=False)
+
+
+# ===============================
+# BACKEND SELECTION
+# ===============================
+# DATA_BACKEND = sheets (default) | sqlite | csv | parquet
+# DATA_PATH    = SQLite file or directory holding <table>.csv/.parquet
+
+def create_backend(sheet_url=None):
+
+    kind = os.environ.get("DATA_BACKEND", "sheets").lower()
+
+    if kind == "sheets":
+
+        return GoogleSheetsBackend(
+            sheet_url,
+            os.environ["GOOGLE_CREDENTIALS_JSON"]
+        )
+
+    if kind == "sqlite":
+
+        return SQLiteBackend(os.environ.get("DATA_PATH", "fleet.db"))
+
+    if kind in ("csv", "parquet"):
+
+        return FileBackend(os.environ.get("DATA_PATH", "data"), kind)
+
+    raise ValueError(f"Unknown DATA_BACKEND: {kind}")
+
+
+# ===============================
+# LAZY CONNECTION
+# ===============================
+# The backend is created on first use instead of at import, so workers
+# boot without touching the network. A failed connection is retried by
+# later calls after an exponential backoff (capped at retry_max), so a
+# transient auth or network error heals without restarting the worker.
+
+class BackendConnector:
+
+
+    def __init__(self, factory, retry_base=1.0, retry_max=60.0):
+
+        self.factory = factory
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+
+        self._backend = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._error = None
+        self._lock = threading.Lock()
+
+
+    def get(self):
+
+        backend = self._backend
+
+        if backend is not None:
+            return backend
+
+        with self._lock:
+
+            if self._backend is not None:
+                return self._backend
+
+            now = time.monotonic()
+
+            if now < self._retry_at:
+                raise ConnectionError(
+                    f"Data backend unavailable, next attempt in "
+                    f"{self._retry_at - now:.0f}s: {self._error}"
+                )
+
+            try:
+
+                self._backend = self.factory()
+
+            except Exception as e:
+
+                self._failures += 1
+                self._error = e
+                self._retry_at = now + min(
+                    self.retry_max,
+                    self.retry_base * 2 ** (self._failures - 1)
+                )
+
+                logging.error(f"Data backend connection failed: {e}")
+
+                raise
+
+            self._failures = 0
+
+            logging.info(f"Data backend ready: {self._backend.name}")
+
+            return self._backend
@@ -0,0 +1,247 @@
+import os
+import random
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+
+# ===============================
+# UPSTREAM FETCH SCHEDULER
+# ===============================
+# Every backend call goes through one scheduler per process:
+#   - quota: a token bucket sized to the upstream per-minute quota
+#     (Google Sheets read/write requests); a 429 empties the bucket so
+#     every caller backs off, not just the one that was refused
+#   - coalescing: concurrent reads of the same table share one call
+#   - retries: transient errors (429, 5xx, network) are retried with
+#     full-jitter exponential backoff, honouring Retry-After
+# Errors that survive the retries are raised, never turned into data.
+#
+# UPSTREAM_QUOTA_PER_MINUTE = 60   requests per minute for rate limited backends
+# UPSTREAM_QUOTA_BURST      = 10   requests allowed back to back
+# UPSTREAM_RETRIES          = 4    retries after the first attempt
+
+UPSTREAM_QUOTA_PER_MINUTE = float(os.environ.get("UPSTREAM_QUOTA_PER_MINUTE", "60"))
+UPSTREAM_QUOTA_BURST = float(os.environ.get("UPSTREAM_QUOTA_BURST", "10"))
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", "4"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+NOT_TRANSIENT = (FileNotFoundError, PermissionError, IsADirectoryError)
+
+
+def status_code(error):
+
+    # gspread.APIError and requests.HTTPError carry the HTTP response
+    response = getattr(error, "response", None)
+
+    return getattr(response, "status_code", None)
+
+
+def retry_after(error):
+
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(error):
+
+    if status_code(error) in RETRY_STATUSES:
+        return True
+
+    return isinstance(error, OSError) and not isinstance(error, NOT_TRANSIENT)
+
+
+# ===============================
+# QUOTA BUCKET
+# ===============================
+
+class QuotaBucket:
+
+
+    def __init__(self, per_minute, burst, clock=time.monotonic, sleep=time.sleep):
+
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, burst)
+        self.clock = clock
+        self.sleep = sleep
+
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+
+    def _refill(self):
+
+        now = self.clock()
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+    def acquire(self):
+
+        # Blocks until a request may be sent, returns seconds waited
+        waited = 0.0
+
+        while True:
+
+            with self._lock:
+
+                self._refill()
+
+                if self.tokens >= 1:
+
+                    self.tokens -= 1
+
+                    return waited
+
+                wait = (1 - self.tokens) / self.rate
+
+            self.sleep(wait)
+
+            waited += wait
+
+
+    def drain(self):
+
+        with self._lock:
+
+            self._refill()
+
+            self.tokens = min(self.tokens, 0.0)
+
+
+# ===============================
+# SCHEDULER
+# ===============================
+
+class FetchScheduler:
+
+
+    def __init__(
+        self,
+        per_minute=UPSTREAM_QUOTA_PER_MINUTE,
+        burst=UPSTREAM_QUOTA_BURST,
+        retries=UPSTREAM_RETRIES,
+        backoff_base=0.5,
+        backoff_max=30.0,
+        clock=time.monotonic,
+        sleep=time.sleep
+    ):
+
+        self.bucket = QuotaBucket(per_minute, burst, clock, sleep)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+
+        self.stats = {
+            "calls": 0,
+            "coalesced": 0,
+            "retries": 0,
+            "failures": 0,
+            "throttled_seconds": 0.0
+        }
+
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+
+    def _count(self, name, amount=1):
+
+        with self._lock:
+            self.stats[name] += amount
+
+
+    def backoff(self, attempt, error):
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+        hinted = retry_after(error)
+
+        return max(delay, hinted) if hinted is not None else delay
+
+
+    def _attempt(self, fn, args, limited):
+
+        for attempt in range(self.retries + 1):
+
+            if limited:
+                self._count("throttled_seconds", self.bucket.acquire())
+
+            self._count("calls")
+
+            try:
+
+                return fn(*args)
+
+            except Exception as e:
+
+                if not is_transient(e) or attempt == self.retries:
+
+                    self._count("failures")
+
+                    raise
+
+                if status_code(e) == 429:
+                    self.bucket.drain()
+
+                delay = self.backoff(attempt, e)
+
+                logging.warning(
+                    f"Upstream call failed ({e}), retry {attempt + 1} in {delay:.1f}s"
+                )
+
+                self._count("retries")
+
+                self.sleep(delay)
+
+
+    def run(self, fn, *args, key=None, limited=True):
+
+        # Calls with the same key while one is running get its result
+        if key is None:
+            return self._attempt(fn, args, limited)
+
+        with self._lock:
+
+            future = self._inflight.get(key)
+
+            owner = future is None
+
+            if owner:
+
+                future = Future()
+
+                self._inflight[key] = future
+
+        if not owner:
+
+            self._count("coalesced")
+
+            return future.result()
+
+        try:
+
+            result = self._attempt(fn, args, limited)
+
+            future.set_result(result)
+
+            return result
+
+        except BaseException as e:
+
+            future.set_exception(e)
+
+            raise
+
+        finally:
+
+            with self._lock:
+                self._inflight.pop(key, None)
@@ -0,0 +1,643 @@
+import re
+import copy
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+
+# ===============================
+# TABLE INDEX
+# ===============================
+# Built once per data refresh. Holds the table plus:
+#   - a hash index on the primary key (first row wins, like .iloc[0])
+#   - secondary indexes value -> row positions (location, status, ...)
+#   - token indexes for comma separated columns such as skills
+#   - skill bitsets: a vocabulary of tokens and one bitmask per row
+#   - lazily, a content hash per row and a fingerprint of the whole table
+#   - a memo for results derived from this snapshot
+# Row positions are kept sorted so selections preserve sheet order.
+#
+# A refresh diffs the new rows against the previous index by primary
+# key (see refresh()). Unchanged tables keep their index as is; edited
+# or appended rows are patched into copies of the buckets, and memo
+# entries untouched by the change set carry over.
+
+TOKEN_SPLIT = re.compile(r"\s*[,;]\s*")
+
+EMPTY_POSITIONS = np.empty(0, dtype=np.intp)
+
+MEMO_SIZE = 1024
+
+
+def split_tokens(value):
+
+    return [
+        token
+        for token in TOKEN_SPLIT.split(str(value).strip().lower())
+        if token
+    ]
+
+
+# ===============================
+# SKILL REQUIREMENTS
+# ===============================
+# A requirement such as "Mapping, Thermal | LiDAR" is a list of groups:
+# every comma separated group is required (all of), and the options
+# inside a group separated by "|" or "or" are alternatives (any of).
+# Tokens are matched whole and case-insensitively, never as substrings.
+
+ANY_SPLIT = re.compile(r"\s*(?:\||\bor\b)\s*")
+
+
+def parse_requirement(value):
+
+    if value is None or value != value:
+        return ()
+
+    groups = []
+
+    for term in TOKEN_SPLIT.split(str(value).strip().lower()):
+
+        options = tuple(sorted({o for o in ANY_SPLIT.split(term) if o}))
+
+        if options:
+            groups.append(options)
+
+    return tuple(sorted(set(groups)))
+
+
+def meets_requirement(tokens, groups):
+
+    return all(any(option in tokens for option in group) for group in groups)
+
+
+class SkillBitset:
+
+
+    def __init__(self, values):
+
+        self.vocabulary = {}
+
+        token_sets = [set(split_tokens(value)) for value in values]
+
+        for tokens in token_sets:
+
+            for token in sorted(tokens):
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        # One uint64 word per 64 tokens of vocabulary
+        self.words = max(1, (len(self.vocabulary) + 63) // 64)
+
+        self.masks = self._pack([
+            sum(1 << self.vocabulary[token] for token in tokens)
+            for tokens in token_sets
+        ])
+
+
+    def updated(self, positions, values, size):
+
+        # Copy with the rows at positions replaced (or appended)
+        new = copy.copy(self)
+
+        new.vocabulary = dict(self.vocabulary)
+
+        token_sets = [set(split_tokens(value)) for value in values]
+
+        for tokens in token_sets:
+
+            for token in sorted(tokens):
+                new.vocabulary.setdefault(token, len(new.vocabulary))
+
+        new.words = max(1, (len(new.vocabulary) + 63) // 64)
+
+        new.masks = np.zeros((size, new.words), dtype=np.uint64)
+        new.masks[:len(self.masks), :self.words] = self.masks[:size]
+
+        new.masks[positions] = new._pack([
+            sum(1 << new.vocabulary[token] for token in tokens)
+            for tokens in token_sets
+        ])
+
+        return new
+
+
+    def _pack(self, bits):
+
+        return np.array(
+            [
+                [(b >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for w in range(self.words)]
+                for b in bits
+            ],
+            dtype=np.uint64
+        ).reshape(len(bits), self.words)
+
+
+    def mask(self, tokens):
+
+        bits = 0
+
+        for token in tokens:
+
+            if token in self.vocabulary:
+                bits |= 1 << self.vocabulary[token]
+
+        return self._pack([bits])[0]
+
+
+    def matching(self, groups):
+
+        required = [group[0] for group in groups if len(group) == 1]
+        alternatives = [group for group in groups if len(group) > 1]
+
+        # A required token nobody has matches no row
+        if any(token not in self.vocabulary for token in required):
+            return EMPTY_POSITIONS
+
+        all_of = self.mask(required)
+
+        match = ((self.masks & all_of) == all_of).all(axis=1)
+
+        for group in alternatives:
+            match &= (self.masks & self.mask(group)).any(axis=1)
+
+        return np.flatnonzero(match)
+
+
+# ===============================
+# CHANGE SETS
+# ===============================
+# Rows inserted, updated and deleted between two copies of a table,
+# by primary key. Rows are compared by content hash.
+
+class ChangeSet:
+
+    __slots__ = ("inserted", "updated", "deleted")
+
+
+    def __init__(self, inserted=(), updated=(), deleted=()):
+
+        self.inserted = list(inserted)
+        self.updated = list(updated)
+        self.deleted = list(deleted)
+
+
+    def __bool__(self):
+
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+    def __str__(self):
+
+        return (
+            f"{len(self.inserted)} inserted, {len(self.updated)} updated, "
+            f"{len(self.deleted)} deleted"
+        )
+
+
+def key_hashes(index):
+
+    if index.key not in index.df.columns:
+        return pd.Series([], dtype="uint64")
+
+    hashes = pd.Series(index.row_hashes(), index=index.df[index.key].tolist())
+
+    # First row wins for duplicate keys, like the key index
+    return hashes[~hashes.index.duplicated()]
+
+
+def diff_indexes(old, new):
+
+    old_hashes = key_hashes(old)
+    new_hashes = key_hashes(new)
+
+    present = new_hashes.index.isin(old_hashes.index)
+
+    common = new_hashes[present]
+
+    changed = (common != old_hashes.reindex(common.index)).to_numpy()
+
+    return ChangeSet(
+        inserted=new_hashes.index[~present],
+        updated=common.index[changed],
+        deleted=old_hashes.index[~old_hashes.index.isin(new_hashes.index)]
+    )
+
+
+def move_positions(buckets, removals, additions):
+
+    # Copy of value -> positions with some positions moved between values
+    buckets = dict(buckets)
+
+    for value in set(removals) | set(additions):
+
+        rows = buckets.get(value, EMPTY_POSITIONS)
+
+        if value in removals:
+            rows = np.setdiff1d(rows, removals[value], assume_unique=True)
+
+        if value in additions:
+            rows = np.union1d(rows, additions[value])
+
+        if len(rows):
+            buckets[value] = rows.astype(np.intp)
+        else:
+            buckets.pop(value, None)
+
+    return buckets
+
+
+class TableIndex:
+
+
+    def __init__(self, df, key, columns=(), token_columns=(), bitset_columns=()):
+
+        self.df = df
+        self.key = key
+        self.options = {
+            "columns": columns,
+            "token_columns": token_columns,
+            "bitset_columns": bitset_columns
+        }
+
+        # Set by refresh(): what changed since the index it came from
+        self.changes = None
+        self.base_fingerprint = None
+
+        self.keys = {}
+        self.columns = {}
+        self.tokens = {}
+        self.bitsets = {}
+
+        self._row_hashes = None
+        self._fingerprint = None
+        self._memo = {}
+
+        if key in df.columns:
+
+            for pos, value in enumerate(df[key].tolist()):
+                self.keys.setdefault(value, pos)
+
+        for column in columns:
+
+            if column in df.columns:
+                self.columns[column] = self._group(df[column].tolist())
+
+        for column in token_columns:
+
+            if column in df.columns:
+
+                buckets = {}
+
+                for pos, value in enumerate(df[column].tolist()):
+
+                    for token in set(split_tokens(value)):
+                        buckets.setdefault(token, []).append(pos)
+
+                self.tokens[column] = {
+                    token: np.asarray(rows, dtype=np.intp)
+                    for token, rows in buckets.items()
+                }
+
+        for column in bitset_columns:
+
+            if column in df.columns:
+                self.bitsets[column] = SkillBitset(df[column].tolist())
+
+
+    @staticmethod
+    def _group(values):
+
+        buckets = {}
+
+        for pos, value in enumerate(values):
+            buckets.setdefault(value, []).append(pos)
+
+        return {
+            value: np.asarray(rows, dtype=np.intp)
+            for value, rows in buckets.items()
+        }
+
+
+    # ---------- content hashes ----------
+
+    def row_hashes(self):
+
+        if self._row_hashes is None:
+            self._row_hashes = pd.util.hash_pandas_object(
+                self.df,
+                index=False
+            ).to_numpy()
+
+        return self._row_hashes
+
+
+    def fingerprint(self):
+
+        # Same data gives the same fingerprint in every worker
+        if self._fingerprint is None:
+
+            digest = hashlib.blake2b(digest_size=12)
+
+            digest.update("\x1f".join(map(str, self.df.columns)).encode())
+            digest.update(self.row_hashes().tobytes())
+
+            self._fingerprint = digest.hexdigest()
+
+        return self._fingerprint
+
+
+    # ---------- per-snapshot memo ----------
+
+    def memo(self, key, build, depends_on=None):
+
+        # build() runs once per key for this snapshot; errors are not
+        # cached. depends_on=(column, value) lets the entry survive a
+        # refresh that touches no row holding that value.
+        try:
+            return self._memo[key][0]
+        except KeyError:
+            pass
+
+        value = build()
+
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+
+        self._memo[key] = (value, depends_on)
+
+        return value
+
+
+    # ---------- incremental refresh ----------
+
+    def refresh(self, df):
+
+        # Index for a newer copy of this table. Returns self when nothing
+        # changed, patches a copy when rows were only edited or appended,
+        # and rebuilds from scratch otherwise. changes is always relative
+        # to base_fingerprint, so self keeps the change set it was built
+        # with and callers treat "is self" as no change.
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+        same_layout = (
+            list(df.columns) == list(self.df.columns)
+            and df.dtypes.equals(self.df.dtypes)
+        )
+
+        if same_layout and np.array_equal(hashes, self.row_hashes()):
+            return self
+
+        old_keys = self.df[self.key].tolist() if self.key in self.df.columns else []
+        new_keys = df[self.key].tolist() if self.key in df.columns else []
+
+        stable = (
+            same_layout
+            and len(self.keys) == len(old_keys)
+            and len(set(new_keys)) == len(new_keys)
+            and new_keys[:len(old_keys)] == old_keys
+        )
+
+        if stable:
+
+            index = self._patched(df, hashes)
+
+        else:
+
+            index = TableIndex(df, self.key, **self.options)
+
+            index._row_hashes = hashes
+
+            index.changes = diff_indexes(self, index)
+
+        index.base_fingerprint = self.fingerprint()
+
+        return index
+
+
+    def _patched(self, df, hashes):
+
+        size = len(self.df)
+
+        old_hashes = self.row_hashes()
+
+        updated = np.flatnonzero(hashes[:size] != old_hashes)
+        inserted = np.arange(size, len(df), dtype=np.intp)
+
+        changed = np.concatenate([updated, inserted]).astype(np.intp)
+
+        new_keys = df[self.key].iloc[changed].tolist()
+
+        index = copy.copy(self)
+
+        index.df = df
+        index.changes = ChangeSet(
+            inserted=new_keys[len(updated):],
+            updated=new_keys[:len(updated)]
+        )
+
+        index._row_hashes = hashes
+        index._fingerprint = None
+
+        index.keys = dict(self.keys)
+
+        for key, pos in zip(new_keys[len(updated):], inserted.tolist()):
+            index.keys[key] = pos
+
+        # Old and new value of every changed row, per column
+        touched = {}
+
+        for column in df.columns:
+
+            touched[column] = (
+                self.df[column].iloc[updated].tolist(),
+                df[column].iloc[changed].tolist()
+            )
+
+        index.columns = {}
+
+        for column, buckets in self.columns.items():
+
+            old_values, new_values = touched[column]
+
+            removals = {}
+            additions = {}
+
+            for pos, value in zip(updated.tolist(), old_values):
+                removals.setdefault(value, []).append(pos)
+
+            for pos, value in zip(changed.tolist(), new_values):
+                additions.setdefault(value, []).append(pos)
+
+            index.columns[column] = move_positions(buckets, removals, additions)
+
+        index.tokens = {}
+
+        for column, buckets in self.tokens.items():
+
+            old_values, new_values = touched[column]
+
+            removals = {}
+            additions = {}
+
+            for pos, value in zip(updated.tolist(), old_values):
+
+                for token in set(split_tokens(value)):
+                    removals.setdefault(token, []).append(pos)
+
+            for pos, value in zip(changed.tolist(), new_values):
+
+                for token in set(split_tokens(value)):
+                    additions.setdefault(token, []).append(pos)
+
+            index.tokens[column] = move_positions(buckets, removals, additions)
+
+        index.bitsets = {
+            column: bitset.updated(changed, touched[column][1], len(df))
+            for column, bitset in self.bitsets.items()
+        }
+
+        # Keep memo entries whose dependency value no changed row held
+        # before or holds now
+        index._memo = {}
+
+        for key, (value, depends_on) in list(self._memo.items()):
+
+            if depends_on is None:
+                continue
+
+            column, dependency = depends_on
+
+            if column not in touched:
+                continue
+
+            old_values, new_values = touched[column]
+
+            if dependency not in old_values and dependency not in new_values:
+                index._memo[key] = (value, depends_on)
+
+        return index
+
+
+    # ---------- point lookups ----------
+
+    def get(self, key):
+
+        pos = self.keys.get(key)
+
+        if pos is None:
+            return None
+
+        return self.df.iloc[pos]
+
+
+    def __contains__(self, key):
+
+        return key in self.keys
+
+
+    # ---------- bucket lookups ----------
+
+    def positions(self, column, value):
+
+        if column in self.columns:
+            return self.columns[column].get(value, EMPTY_POSITIONS)
+
+        # Column without a secondary index: plain scan
+        if column not in self.df.columns:
+            return EMPTY_POSITIONS
+
+        return np.flatnonzero((self.df[column] == value).to_numpy())
+
+
+    def token_positions(self, column, needle):
+
+        # Substring semantics of str.contains(needle, case=False), answered
+        # from the token vocabulary whenever the needle fits inside a token
+        needle = str(needle).lower()
+
+        if column not in self.tokens:
+            return self.scan_positions(column, needle)
+
+        if needle != needle.strip() or TOKEN_SPLIT.search(needle):
+            return self.scan_positions(column, needle)
+
+        matches = [
+            rows
+            for token, rows in self.tokens[column].items()
+            if needle in token
+        ]
+
+        if not matches:
+            return EMPTY_POSITIONS
+
+        return np.unique(np.concatenate(matches))
+
+
+    def requirement_positions(self, column, requirement):
+
+        # Rows whose tokens satisfy a parsed requirement (all-of / any-of)
+        if not requirement:
+            return np.arange(len(self.df), dtype=np.intp)
+
+        if column in self.bitsets:
+            return self.bitsets[column].matching(requirement)
+
+        if column not in self.df.columns:
+            return EMPTY_POSITIONS
+
+        return np.flatnonzero([
+            meets_requirement(set(split_tokens(value)), requirement)
+            for value in self.df[column].tolist()
+        ]).astype(np.intp)
+
+
+    def scan_positions(self, column, needle):
+
+        if column not in self.df.columns:
+            return EMPTY_POSITIONS
+
+        mask = self.df[column].astype(str).str.lower().str.contains(
+            str(needle).lower(),
+            regex=False
+        ).to_numpy()
+
+        return np.flatnonzero(mask)
+
+
+    def lookup(self, **equals):
+
+        result = None
+
+        for column, value in equals.items():
+
+            rows = self.positions(column, value)
+
+            result = rows if result is None else np.intersect1d(
+                result,
+                rows,
+                assume_unique=True
+            )
+
+            if len(result) == 0:
+                break
+
+        if result is None:
+            return np.arange(len(self.df), dtype=np.intp)
+
+        return result
+
+
+    def select(self, positions):
+
+        return self.df.iloc[positions]
+
+
+def intersect(*position_sets):
+
+    result = position_sets[0]
+
+    for rows in position_sets[1:]:
+        result = np.intersect1d(result, rows, assume_unique=True)
+
+    return result
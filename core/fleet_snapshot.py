@@ -0,0 +1,136 @@
+import itertools
+import threading
+
+from core.interval_index import BookingIndex
+
+
+# ===============================
+# FLEET SNAPSHOT
+# ===============================
+# One read-only view of pilots, drones and missions taken at a single
+# instant, plus the booking indexes derived from it. A request takes
+# one snapshot and passes it down, so every lookup and check it makes
+# reads the same data whatever is refreshed or written meanwhile.
+#
+# A newer snapshot replaces the current one with a single reference
+# swap. Readers never lock; a request holding the old snapshot keeps
+# using it until it finishes.
+
+_snapshot_versions = itertools.count(1)
+
+
+def build_booking_index(resources, missions):
+
+    if "current_assignment" not in resources.df.columns:
+        return BookingIndex()
+
+    return BookingIndex.from_assignments(
+        resources.df[resources.key].tolist(),
+        resources.df["current_assignment"].tolist(),
+        missions
+    )
+
+
+def is_refresh_of(resources, previous):
+
+    # Change set is usable when it was taken against previous and the
+    # ids are unique (bookings are keyed by id)
+    return (
+        resources.changes is not None
+        and resources.base_fingerprint == previous.fingerprint()
+        and "current_assignment" in resources.df.columns
+        and len(resources.keys) == len(resources.df)
+    )
+
+
+class FleetSnapshot:
+
+
+    def __init__(self, pilots, drones, missions, table_versions, previous=None):
+
+        self.pilots = pilots
+        self.drones = drones
+        self.missions = missions
+
+        # Cache version of each table the snapshot was built from
+        self.table_versions = table_versions
+
+        self.version = next(_snapshot_versions)
+
+        self._bookings = {}
+        self._lock = threading.Lock()
+
+        # Booking indexes carry over when missions are unchanged: as is
+        # for the same resource table, patched for the changed rows when
+        # the table was refreshed from the previous one
+        if previous is not None and previous.missions is missions:
+
+            with previous._lock:
+
+                for name, resources in (("pilots", pilots), ("drones", drones)):
+
+                    bookings = previous._bookings.get(name)
+
+                    if bookings is None:
+                        continue
+
+                    if getattr(previous, name) is resources:
+
+                        self._bookings[name] = bookings
+
+                    elif is_refresh_of(resources, getattr(previous, name)):
+
+                        changes = resources.changes
+
+                        self._bookings[name] = bookings.updated(
+                            resources,
+                            changes.inserted + changes.updated + changes.deleted,
+                            missions
+                        )
+
+
+    # ---------- lookups ----------
+
+    def pilot(self, pilot_id):
+
+        return self.pilots.get(pilot_id)
+
+
+    def drone(self, drone_id):
+
+        return self.drones.get(drone_id)
+
+
+    def mission(self, project_id):
+
+        return self.missions.get(project_id)
+
+
+    # ---------- booking indexes ----------
+
+    def _booking_index(self, name):
+
+        index = self._bookings.get(name)
+
+        if index is not None:
+            return index
+
+        with self._lock:
+
+            if name not in self._bookings:
+                self._bookings[name] = build_booking_index(
+                    getattr(self, name),
+                    self.missions
+                )
+
+            return self._bookings[name]
+
+
+    def pilot_bookings(self):
+
+        return self._booking_index("pilots")
+
+
+    def drone_bookings(self):
+
+        return self._booking_index("drones")
@@ -0,0 +1,174 @@
+import numpy as np
+
+from core.fleet_index import TOKEN_SPLIT
+
+
+# ===============================
+# BOOKING INTERVAL INDEX
+# ===============================
+# Booked mission windows per resource (pilot or drone), kept as start
+# times sorted ascending plus a running maximum of end times. A window
+# [start, end] overlaps a booking iff some booking with
+# booking_start <= end also has booking_end >= start, which is one
+# binary search and one array read: O(log n) per query.
+#
+# current_assignment may hold several project ids ("PRJ001, PRJ004"),
+# so a resource can carry any number of future bookings.
+
+def split_assignments(value):
+
+    if value is None or value != value:
+        return []
+
+    return [
+        project_id
+        for project_id in TOKEN_SPLIT.split(str(value).strip())
+        if project_id
+    ]
+
+
+def to_ns(value):
+
+    return np.datetime64(value, "ns").astype(np.int64)
+
+
+class BookingIndex:
+
+
+    def __init__(self):
+
+        self.starts = {}
+        self.ends = {}
+        self.max_ends = {}
+        self.projects = {}
+        self.invalid = set()
+
+
+    @classmethod
+    def from_assignments(cls, resource_ids, assignments, missions):
+
+        index = cls()
+
+        index._load(resource_ids, assignments, missions)
+
+        return index
+
+
+    def _load(self, resource_ids, assignments, missions):
+
+        bookings = {}
+
+        starts = missions.df["start_date"].to_numpy() if len(missions.df) else []
+        ends = missions.df["end_date"].to_numpy() if len(missions.df) else []
+
+        for resource_id, value in zip(resource_ids, assignments):
+
+            # First row wins for duplicate ids, like the key index
+            if resource_id in bookings or resource_id in self.invalid:
+                continue
+
+            windows = []
+
+            for project_id in split_assignments(value):
+
+                pos = missions.keys.get(project_id)
+
+                if pos is None:
+                    continue
+
+                if np.isnat(starts[pos]) or np.isnat(ends[pos]):
+
+                    self.invalid.add(resource_id)
+
+                    break
+
+                windows.append((to_ns(starts[pos]), to_ns(ends[pos]), project_id))
+
+            if resource_id not in self.invalid:
+                bookings[resource_id] = windows
+
+        for resource_id, windows in bookings.items():
+
+            if windows:
+                self.add(resource_id, windows)
+
+
+    def updated(self, resources, resource_ids, missions):
+
+        # Copy with only the given resources re-read from the table
+        index = BookingIndex()
+
+        index.starts = dict(self.starts)
+        index.ends = dict(self.ends)
+        index.max_ends = dict(self.max_ends)
+        index.projects = dict(self.projects)
+        index.invalid = set(self.invalid)
+
+        for resource_id in resource_ids:
+
+            for bookings in (index.starts, index.ends, index.max_ends, index.projects):
+                bookings.pop(resource_id, None)
+
+            index.invalid.discard(resource_id)
+
+        present = [rid for rid in resource_ids if rid in resources.keys]
+
+        index._load(
+            present,
+            resources.df["current_assignment"].iloc[
+                [resources.keys[rid] for rid in present]
+            ].tolist(),
+            missions
+        )
+
+        return index
+
+
+    def add(self, resource_id, windows):
+
+        windows = sorted(windows)
+
+        self.starts[resource_id] = np.array([w[0] for w in windows], dtype=np.int64)
+        self.ends[resource_id] = np.array([w[1] for w in windows], dtype=np.int64)
+        self.max_ends[resource_id] = np.maximum.accumulate(self.ends[resource_id])
+        self.projects[resource_id] = [w[2] for w in windows]
+
+
+    # ---------- queries ----------
+
+    def has_overlap(self, resource_id, start, end):
+
+        starts = self.starts.get(resource_id)
+
+        if starts is None:
+            return False
+
+        k = np.searchsorted(starts, to_ns(end), side="right")
+
+        return bool(k > 0 and self.max_ends[resource_id][k - 1] >= to_ns(start))
+
+
+    def has_overlap_many(self, resource_ids, start, end):
+
+        start = to_ns(start)
+        end = to_ns(end)
+
+        result = np.zeros(len(resource_ids), dtype=bool)
+
+        for i, resource_id in enumerate(resource_ids):
+
+            starts = self.starts.get(resource_id)
+
+            if starts is None:
+                continue
+
+            k = starts.searchsorted(end, side="right")
+
+            result[i] = k > 0 and self.max_ends[resource_id][k - 1] >= start
+
+        return result
+
+
+    def bookings(self, resource_id):
+
+        return list(self.projects.get(resource_id, []))
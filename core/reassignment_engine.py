@@ -1,6 +1,7 @@
 from core.assignment_engine import match_resources
-from core.conflict_detector import detect_conflicts
-from core.sheets_service import update_pilot_status
+from core.conflict_detector import detect_conflicts_bulk
+from core.sheets_service import assign_resources, get_fleet_snapshot
+from core.reservations import reserve, release, resource_key
 import logging
 
 
@@ -8,12 +9,16 @@ import logging
 # INTELLIGENT URGENT REASSIGNMENT
 # ===============================
 
-def urgent_reassign(project_id):
+def urgent_reassign(project_id, snapshot=None):
 
     try:
 
+        # Match, conflict checks and the booking read the same snapshot
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
+
         # Get ranked pilots and drones
-        result = match_resources(project_id)
+        result = match_resources(project_id, snapshot)
 
         if isinstance(result, str):
 
@@ -39,21 +44,64 @@ def urgent_reassign(project_id):
         drone = drones.iloc[0]
         drone_id = drone["drone_id"]
 
+        # Check every ranked pilot against the drone in one pass
+        checks = detect_conflicts_bulk(
+            project_id,
+            pilots["pilot_id"].tolist(),
+            [drone_id],
+            snapshot
+        )
+
+        if isinstance(checks, str):
+
+            logging.error("Conflict check failed during reassignment")
+
+            return checks
+
+        conflict_free = checks["conflict_free"].to_numpy()
+
+        mission = snapshot.mission(project_id)
+
         # Find best conflict-free pilot
-        for _, pilot in pilots.iterrows():
+        for row, (_, pilot) in enumerate(pilots.iterrows()):
 
             pilot_id = pilot["pilot_id"]
 
-            conflict_result = detect_conflicts(
-                project_id,
-                pilot_id,
-                drone_id
-            )
+            if conflict_free[row]:
+
+                resources = [
+                    resource_key("pilot", pilot_id),
+                    resource_key("drone", drone_id)
+                ]
+
+                # Compare-and-set claim, a concurrent request may have
+                # booked this pilot or drone since the conflict check
+                taken = reserve(
+                    project_id,
+                    resources,
+                    mission["start_date"],
+                    mission["end_date"]
+                )
+
+                if taken == resources[1]:
+
+                    logging.warning(f"Drone {drone_id} reserved concurrently")
+
+                    return "Drone was booked by a concurrent request"
+
+                if taken:
+                    continue
+
+                # Book pilot, drone and mission together
+                booking = assign_resources(project_id, pilot_id, drone_id, snapshot)
+
+                if not booking.startswith("Project"):
+
+                    release(project_id, resources)
 
-            if conflict_result == "No conflicts detected":
+                    logging.error(f"Assignment write failed: {booking}")
 
-                # Assign pilot
-                update_pilot_status(pilot_id, "Assigned")
+                    return booking
 
                 logging.info(
                     f"Pilot {pilot_id} assigned to project {project_id}"
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+
+# ===============================
+# RESOURCE RESERVATIONS
+# ===============================
+# Local reservation table shared by every uvicorn worker on the host.
+# reserve() is a compare-and-set: inside one short SQLite write
+# transaction it checks that no other reservation overlaps the mission
+# window for any of the resources, and records all of them only if so.
+# Two requests racing for the same pilot or drone cannot both win.
+# BEGIN IMMEDIATE locks the whole database, so every reserve() runs one
+# at a time, whatever resources it claims; the transaction is a few
+# indexed statements, so the wait is short.
+#
+# Reservations outlive the request (RESERVATION_TTL seconds) so workers
+# whose cached roster does not show the booking yet still respect it.
+
+RESERVATIONS_DB = os.environ.get("RESERVATIONS_DB", "reservations.db")
+RESERVATION_TTL = float(os.environ.get("RESERVATION_TTL", "3600"))
+
+_local = threading.local()
+
+
+def _connect():
+
+    conn = getattr(_local, "conn", None)
+
+    if conn is None:
+
+        conn = sqlite3.connect(RESERVATIONS_DB, timeout=10, isolation_level=None)
+
+        conn.execute("PRAGMA journal_mode=WAL")
+
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS reservations ("
+            "resource TEXT, project_id TEXT, "
+            "start_ns INTEGER, end_ns INTEGER, expires_at REAL)"
+        )
+
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reservations_resource "
+            "ON reservations (resource, start_ns)"
+        )
+
+        _local.conn = conn
+
+    return conn
+
+
+def resource_key(kind, resource_id):
+
+    return f"{kind}:{resource_id}"
+
+
+def reserve(project_id, resources, start, end):
+
+    # Returns None on success, otherwise the resource already taken
+    conn = _connect()
+
+    now = time.time()
+
+    conn.execute("BEGIN IMMEDIATE")
+
+    try:
+
+        conn.execute("DELETE FROM reservations WHERE expires_at < ?", (now,))
+
+        for resource in resources:
+
+            taken = conn.execute(
+                "SELECT project_id FROM reservations "
+                "WHERE resource = ? AND start_ns <= ? AND end_ns >= ? LIMIT 1",
+                (resource, end.value, start.value)
+            ).fetchone()
+
+            if taken:
+
+                conn.execute("ROLLBACK")
+
+                logging.warning(f"{resource} already reserved for {taken[0]}")
+
+                return resource
+
+        conn.executemany(
+            "INSERT INTO reservations VALUES (?, ?, ?, ?, ?)",
+            [
+                (resource, project_id, start.value, end.value, now + RESERVATION_TTL)
+                for resource in resources
+            ]
+        )
+
+        conn.execute("COMMIT")
+
+        return None
+
+    except Exception:
+
+        conn.execute("ROLLBACK")
+
+        raise
+
+
+def release(project_id, resources):
+
+    conn = _connect()
+
+    conn.executemany(
+        "DELETE FROM reservations WHERE resource = ? AND project_id = ?",
+        [(resource, project_id) for resource in resources]
+    )
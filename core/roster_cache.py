@@ -0,0 +1,344 @@
+import threading
+import time
+import logging
+
+
+# ===============================
+# CACHE ENTRY
+# ===============================
+
+class CacheEntry:
+
+    __slots__ = ("value", "version", "loaded_at")
+
+
+    def __init__(self, value, version, loaded_at):
+
+        self.value = value
+        self.version = version
+        self.loaded_at = loaded_at
+
+
+# ===============================
+# ROSTER CACHE
+# ===============================
+# Per-table TTL cache with stale-while-revalidate:
+#   age < ttl                     -> served from memory
+#   ttl <= age < ttl * max_stale  -> served stale, refreshed in background
+#   age >= ttl * max_stale        -> reader waits for a fresh load
+# A failed load never replaces data already in the cache, and a reader
+# that had to wait gets the old copy back rather than an error.
+#
+# loader(table) returns {table: value} for the table asked for and any
+# other tables read in the same upstream call. They are stored together
+# in one step, except tables whose entry changed while the load was in
+# flight (a local write patched them): the loaded copy of those predates
+# the write and is dropped.
+
+class RosterCache:
+
+
+    def __init__(self, loader, ttls=None, default_ttl=60, max_stale_factor=5):
+
+        self.loader = loader
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_stale_factor = max_stale_factor
+
+        self._entries = {}
+        self._versions = {}
+        self._listeners = []
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._table_locks = {}
+
+
+    def ttl(self, table):
+
+        return self.ttls.get(table, self.default_ttl)
+
+
+    def _table_lock(self, table):
+
+        with self._lock:
+
+            return self._table_locks.setdefault(table, threading.Lock())
+
+
+    # ---------- reads ----------
+
+    def get(self, table):
+
+        entry = self._entries.get(table)
+
+        if entry is None:
+            return self._load(table)
+
+        age = time.monotonic() - entry.loaded_at
+        ttl = self.ttl(table)
+
+        if age < ttl:
+            return entry.value
+
+        if age < ttl * self.max_stale_factor:
+
+            self.refresh_async(table)
+
+            return entry.value
+
+        return self._load(table)
+
+
+    def is_ready(self, table):
+
+        # True when get() would answer from memory without waiting
+        entry = self._entries.get(table)
+
+        if entry is None:
+            return False
+
+        age = time.monotonic() - entry.loaded_at
+
+        return age < self.ttl(table) * self.max_stale_factor
+
+
+    def peek(self, table):
+
+        # Cached value without loading or refreshing, None if missing
+        entry = self._entries.get(table)
+
+        return entry.value if entry else None
+
+
+    def entries(self, tables):
+
+        # Entries of several tables as of one instant (None if missing)
+        with self._lock:
+
+            return {table: self._entries.get(table) for table in tables}
+
+
+    def _load(self, table):
+
+        requested_at = time.monotonic()
+
+        with self._table_lock(table):
+
+            # Another reader may have finished the load while we waited
+            entry = self._entries.get(table)
+
+            if entry is not None and entry.loaded_at >= requested_at:
+                return entry.value
+
+            try:
+
+                return self._fetch(table)
+
+            except Exception as e:
+
+                # Past max staleness, but old data beats no data
+                if entry is None:
+                    raise
+
+                logging.error(f"Load failed for {table}, serving stale copy: {e}")
+
+                return entry.value
+
+
+    def _fetch(self, table):
+
+        # Caller holds the table lock
+        with self._lock:
+            started = dict(self._versions)
+
+        values = self.loader(table)
+
+        loaded_at = time.monotonic()
+
+        skipped = self._store_many(
+            [(name, value, loaded_at) for name, value in values.items()],
+            expected=started
+        )
+
+        for name in skipped:
+            logging.info(f"{name} was written during its refresh, kept the written copy")
+
+        entry = self._entries.get(table)
+
+        return entry.value if entry is not None else values[table]
+
+
+    def _store(self, table, value, loaded_at=None):
+
+        if loaded_at is None:
+            loaded_at = time.monotonic()
+
+        self._store_many([(table, value, loaded_at)])
+
+        return value
+
+
+    def _store_many(self, items, expected=None, partial=True):
+
+        # expected={table: version}: tables whose version moved on since
+        # are skipped, or nothing is stored when partial is False.
+        # Returns the skipped tables.
+        stored = []
+        skipped = []
+
+        # Every table becomes visible under the same lock acquisition
+        with self._lock:
+
+            if expected is not None and not partial:
+
+                skipped = [
+                    table
+                    for table, _, _ in items
+                    if self._versions.get(table, 0) != expected.get(table, 0)
+                ]
+
+                if skipped:
+                    return skipped
+
+            for table, value, loaded_at in items:
+
+                if expected is not None and self._versions.get(table, 0) != expected.get(table, 0):
+
+                    skipped.append(table)
+
+                    continue
+
+                version = self._versions.get(table, 0) + 1
+                self._versions[table] = version
+
+                self._entries[table] = CacheEntry(value, version, loaded_at)
+
+                stored.append((table, value, version))
+
+            listeners = list(self._listeners)
+
+        for table, value, version in stored:
+
+            for listener in listeners:
+
+                try:
+                    listener(table, value, version)
+                except Exception as e:
+                    logging.error(f"Cache listener error for {table}: {e}")
+
+        return skipped
+
+
+    # ---------- refresh ----------
+
+    def refresh(self, table):
+
+        with self._table_lock(table):
+
+            return self._fetch(table)
+
+
+    def refresh_async(self, table):
+
+        with self._lock:
+
+            if table in self._refreshing:
+                return
+
+            self._refreshing.add(table)
+
+        thread = threading.Thread(
+            target=self._background_refresh,
+            args=(table,),
+            daemon=True
+        )
+
+        thread.start()
+
+
+    def _background_refresh(self, table):
+
+        try:
+
+            self.refresh(table)
+
+            logging.info(f"Background refresh completed for {table}")
+
+        except Exception as e:
+
+            logging.error(f"Background refresh failed for {table}: {e}")
+
+        finally:
+
+            with self._lock:
+                self._refreshing.discard(table)
+
+
+    def prime(self, table, value, age):
+
+        # Seed from a persisted snapshot of the given age. Capped at the
+        # TTL so it is served immediately and refreshed in the background.
+        loaded_at = time.monotonic() - min(age, self.ttl(table))
+
+        with self._table_lock(table):
+
+            if table not in self._entries:
+                self._store(table, value, loaded_at)
+
+
+    # ---------- local writes ----------
+
+    def update_many(self, patches):
+
+        # Local writes to several tables, visible to readers together.
+        # Table locks are taken in name order so writers cannot deadlock.
+        tables = sorted(patches)
+
+        locks = [self._table_lock(table) for table in tables]
+
+        for lock in locks:
+            lock.acquire()
+
+        try:
+
+            # A load of another table may store these while the patches
+            # run; patch the newer copy again rather than overwrite it
+            while True:
+
+                with self._lock:
+
+                    entries = {table: self._entries.get(table) for table in tables}
+                    versions = {table: self._versions.get(table, 0) for table in tables}
+
+                items = [
+                    (table, patches[table](entry.value), entry.loaded_at)
+                    for table, entry in entries.items()
+                    if entry is not None
+                ]
+
+                if not self._store_many(items, expected=versions, partial=False):
+                    return {table: value for table, value, _ in items}
+
+        finally:
+
+            for lock in reversed(locks):
+                lock.release()
+
+
+    # ---------- invalidation ----------
+
+    def invalidate(self, table=None):
+
+        with self._lock:
+
+            if table is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(table, None)
+
+
+    def add_listener(self, listener):
+
+        with self._lock:
+
+            self._listeners.append(listener)
@@ -0,0 +1,114 @@
+from core.sheets_service import get_table_index, change_logs
+from core.data_backends import PILOTS_TABLE, DRONES_TABLE, MISSIONS_TABLE
+from core.fleet_index import intersect
+
+
+# ===============================
+# ROSTER QUERIES
+# ===============================
+# Filtered, projected, cursor-paginated reads of one table.
+# The cursor is the primary key of the last row returned; the next page
+# starts right after that row, so pages stay stable while rows are
+# updated in place.
+
+SKILL_COLUMNS = {
+    PILOTS_TABLE: "skills",
+    DRONES_TABLE: "capabilities",
+    MISSIONS_TABLE: "required_skills"
+}
+
+
+def query_table(
+    table,
+    status=None,
+    location=None,
+    skill=None,
+    fields=None,
+    cursor=None,
+    limit=None
+):
+
+    index = get_table_index(table)
+
+    equals = {
+        column: value
+        for column, value in (("status", status), ("location", location))
+        if value is not None
+    }
+
+    positions = index.lookup(**equals)
+
+    if skill:
+
+        column = SKILL_COLUMNS.get(table)
+
+        # A missing column would silently match nothing
+        if column not in index.df.columns:
+            raise ValueError(f"{table} has no skill column to filter on")
+
+        positions = intersect(
+            positions,
+            index.token_positions(column, skill)
+        )
+
+    if cursor is not None:
+
+        after = index.keys.get(cursor)
+
+        if after is None:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+        positions = positions[positions > after]
+
+    next_cursor = None
+
+    if limit is not None and len(positions) > limit:
+
+        positions = positions[:limit]
+
+        next_cursor = index.df[index.key].iloc[positions[-1]]
+
+    rows = index.select(positions)
+
+    return project(rows, fields), next_cursor
+
+
+def project(rows, fields):
+
+    if not fields:
+        return rows
+
+    unknown = [field for field in fields if field not in rows.columns]
+
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return rows[list(fields)]
+
+
+# ===============================
+# DELTA QUERIES
+# ===============================
+# Rows changed since a version previously handed to the client (the
+# table fingerprint, also sent as the ETag). Returns
+# (version, full, rows, deleted_keys); full=True means the old version
+# is no longer known and rows is the whole table.
+
+def table_delta(table, since, fields=None):
+
+    index = get_table_index(table)
+
+    version = index.fingerprint()
+
+    change = change_logs[table].since(since, version)
+
+    if change is None:
+        return version, True, project(index.df, fields), []
+
+    changed, deleted = change
+
+    positions = sorted(index.keys[key] for key in changed if key in index.keys)
+
+    rows = index.select(positions)
+
+    return version, False, project(rows, fields), sorted(deleted, key=str)
@@ -1,11 +1,26 @@
-import gspread
-import json
 import os
+import time
+import threading
 import pandas as pd
-from oauth2client.service_account import ServiceAccountCredentials
-from functools import lru_cache
 import logging
 
+from core.data_backends import (
+    create_backend,
+    BackendConnector,
+    StaleRowError,
+    TABLES,
+    PILOTS_TABLE,
+    DRONES_TABLE,
+    MISSIONS_TABLE
+)
+from core.roster_cache import RosterCache
+from core.fleet_index import TableIndex
+from core.change_log import ChangeLog
+from core.fetch_scheduler import FetchScheduler
+from core.interval_index import split_assignments
+from core.fleet_snapshot import FleetSnapshot
+from core.snapshot_store import create_snapshot_store, load_shared
+
 
 # ================================
 # Logging setup
@@ -17,127 +32,553 @@ logging.basicConfig(
 )
 
 
+# ================================
+# Copy-on-write snapshots
+# ================================
+# Cached tables are shared by every request. With copy-on-write enabled
+# callers get cheap shallow views and any in-place change they make is
+# copied lazily instead of leaking into the cache, so the cached frames
+# are only ever replaced through the update functions below.
+pd.set_option("mode.copy_on_write", True)
+
+
 # ================================
 # Google Sheets config
 # ================================
 SHEET_URL = "https://docs.google.com/spreadsheets/d/148iSDjZ_EBBCHBfDucSyQFVP8lKg8yHqINGKfqCAv18/edit"
 
-scope = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive"
-]
-
 
 # ================================
-# Load credentials securely from Render environment variable
+# Data backend (Google Sheets, SQLite or CSV/Parquet directory)
+# selected by the DATA_BACKEND environment variable. Connected lazily
+# on first use and retried with backoff, never at import.
 # ================================
-try:
+backend_connector = BackendConnector(lambda: create_backend(SHEET_URL))
+
+
+def get_backend():
 
-    creds_dict = json.loads(os.environ["GOOGLE_CREDENTIALS_JSON"])
+    return backend_connector.get()
 
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(
-        creds_dict,
-        scope
+
+# Quota, coalescing and retries for every upstream call
+# (see core/fetch_scheduler.py)
+upstream = FetchScheduler()
+
+
+def call_backend(method, *args, key=None):
+
+    backend = get_backend()
+
+    return upstream.run(
+        getattr(backend, method),
+        *args,
+        key=key,
+        limited=backend.rate_limited
     )
 
-    client = gspread.authorize(creds)
 
-    spreadsheet = client.open_by_url(SHEET_URL)
+# ===============================
+# ROSTER CACHE
+# ===============================
+# Seconds before a table is considered stale, overridable per table
+# with CACHE_TTL_PILOT_ROSTER / CACHE_TTL_DRONE_FLEET / CACHE_TTL_MISSIONS
 
-    logging.info("Google Sheets connection successful")
+CACHE_TTLS = {
+    PILOTS_TABLE: 60,
+    DRONES_TABLE: 120,
+    MISSIONS_TABLE: 300
+}
 
-except Exception as e:
+for _table in CACHE_TTLS:
 
-    logging.error(f"Google Sheets connection failed: {e}")
+    _override = os.environ.get(f"CACHE_TTL_{_table.upper()}")
 
-    spreadsheet = None
+    if _override:
+        CACHE_TTLS[_table] = float(_override)
 
 
 # ===============================
-# PILOTS
+# TABLE INDEXES
 # ===============================
+# Primary key plus secondary / token indexes and skill bitsets,
+# rebuilt with every refresh
+
+TABLE_INDEXES = {
+    PILOTS_TABLE: {
+        "key": "pilot_id",
+        "columns": ("location", "status"),
+        "token_columns": ("skills",),
+        "bitset_columns": ("skills", "certifications")
+    },
+    DRONES_TABLE: {
+        "key": "drone_id",
+        "columns": ("location", "status")
+    },
+    MISSIONS_TABLE: {
+        "key": "project_id",
+        "columns": ("location",)
+    }
+}
 
-@lru_cache(maxsize=1)
-def get_pilots_cached():
 
-    try:
+# ===============================
+# DATE NORMALIZATION
+# ===============================
+# Date columns are parsed once per fetch so the hot path never calls
+# strptime. Blank or malformed dates become NaT.
+
+DATE_FORMAT = "%Y-%m-%d"
+
+DATE_COLUMNS = {
+    DRONES_TABLE: ("maintenance_due",),
+    MISSIONS_TABLE: ("start_date", "end_date")
+}
+
+
+def normalize_dates(table, df):
+
+    columns = [c for c in DATE_COLUMNS.get(table, ()) if c in df.columns]
+
+    if not columns:
+        return df
+
+    parsed = {
+        column: pd.to_datetime(df[column], format=DATE_FORMAT, errors="coerce")
+        for column in columns
+    }
+
+    if table == MISSIONS_TABLE and len(columns) == 2:
+
+        parsed["duration_days"] = (
+            parsed["end_date"] - parsed["start_date"]
+        ).dt.days + 1
+
+    return df.assign(**parsed)
+
+
+def to_records(df):
+
+    # Inverse of normalize_dates for JSON responses
+    out = df
+
+    for column in df.columns:
 
-        sheet = spreadsheet.worksheet("pilot_roster")
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            out = out.assign(**{column: df[column].dt.strftime(DATE_FORMAT)})
 
-        data = sheet.get_all_records()
+    out = out.astype(object).where(out.notna(), "")
 
-        logging.info("Pilot roster fetched")
+    return out.to_dict(orient="records")
 
-        return pd.DataFrame(data)
+
+# ================================
+# Shared snapshot store (optional, see core/snapshot_store.py)
+# ================================
+try:
+
+    snapshot_store = create_snapshot_store()
+
+except Exception as e:
+
+    logging.error(f"Snapshot store unavailable: {e}")
+
+    snapshot_store = None
+
+
+def publish(table, df, fetched_at=None):
+
+    # Best effort: the data is already upstream and in this worker's
+    # cache, a store failure only costs the other workers a refetch
+    if snapshot_store is None:
+        return
+
+    try:
+
+        snapshot_store.save(table, df, fetched_at=fetched_at)
 
     except Exception as e:
 
-        logging.error(f"Pilot fetch error: {e}")
+        logging.error(f"Snapshot store save failed for {table}: {e}")
 
-        return pd.DataFrame()
 
+def fetch_upstream_all():
+
+    # Every table in one backend call (one batchGet on Sheets), so a
+    # refresh is a single round trip and the tables match each other.
+    # Concurrent loads of different tables share the same call.
+    frames = call_backend("fetch_tables", TABLES, key=("fetch_tables",))
+
+    logging.info("All tables fetched")
+
+    return {table: normalize_dates(table, frames[table]) for table in TABLES}
+
+
+def fetch_upstream(table):
+
+    # The other tables of the read are cached and shared along with the
+    # requested one instead of being fetched again later
+    return fetch_upstream_all()
+
+
+def build_index(table, data):
+
+    # Diff against the cached copy by primary key: unchanged tables keep
+    # their index, edits and appends patch it (see TableIndex.refresh)
+    previous = roster_cache.peek(table)
+
+    if previous is None:
+        return TableIndex(data, **TABLE_INDEXES[table])
+
+    index = previous.refresh(data)
+
+    # An unchanged table comes back as the same index, whose change set
+    # still describes the refresh that produced it
+    if index is not previous and index.changes:
+        logging.info(f"{table} changed: {index.changes}")
+
+    return index
+
+
+def fetch_table(table):
+
+    # {table: index} for every table the load returned
+    if snapshot_store is None:
+
+        data = fetch_upstream(table)
+
+    else:
+
+        data = load_shared(
+            snapshot_store,
+            table,
+            CACHE_TTLS[table],
+            fetch_upstream
+        )
+
+    return {name: build_index(name, df) for name, df in data.items()}
 
-def get_pilots():
 
-    return get_pilots_cached().copy()
+roster_cache = RosterCache(fetch_table, ttls=CACHE_TTLS)
 
 
 # ===============================
-# DRONES
+# CHANGE LOGS
 # ===============================
+# Every snapshot the cache takes in (refresh, local write, warm start)
+# is diffed against the previous one for delta responses
 
-@lru_cache(maxsize=1)
-def get_drones_cached():
+change_logs = {table: ChangeLog() for table in TABLES}
 
-    try:
 
-        sheet = spreadsheet.worksheet("drone_fleet")
+def record_changes(table, index, version):
+
+    if table in change_logs:
+        change_logs[table].record(index)
+
+
+roster_cache.add_listener(record_changes)
+
+
+# ===============================
+# WARM START
+# ===============================
+# Serve the last persisted snapshot right away after a restart and let
+# the cache refresh it from upstream in the background. Started by the
+# API lifespan hook on a background thread, never at import.
+
+def warm_start():
+
+    if snapshot_store is None:
+        return
+
+    for table in TABLES:
+
+        try:
+
+            fetched_at = snapshot_store.fetched_at(table)
+
+            if fetched_at is None:
+                continue
+
+            data = snapshot_store.load(table)
+
+            if data is None:
+                continue
+
+            roster_cache.prime(
+                table,
+                TableIndex(data, **TABLE_INDEXES[table]),
+                time.time() - fetched_at
+            )
 
-        data = sheet.get_all_records()
+            logging.info(f"{table} warm-started from snapshot")
 
-        logging.info("Drone fleet fetched")
+        except Exception as e:
 
-        return pd.DataFrame(data)
+            logging.error(f"Warm start failed for {table}: {e}")
+
+
+def warm_caches():
+
+    # Persisted snapshots first so requests are served at once, then
+    # upstream for anything still missing
+    warm_start()
+
+    for table in TABLES:
+
+        if not roster_cache.is_ready(table):
+            roster_cache.refresh_async(table)
+
+
+def start_background_warmup():
+
+    thread = threading.Thread(
+        target=warm_caches,
+        name="cache-warmup",
+        daemon=True
+    )
+
+    thread.start()
+
+    return thread
+
+
+def get_table_index(table):
+
+    try:
+
+        return roster_cache.get(table)
 
     except Exception as e:
 
-        logging.error(f"Drone fetch error: {e}")
+        logging.error(f"{table} fetch error: {e}")
+
+        return TableIndex(pd.DataFrame(), **TABLE_INDEXES[table])
+
+
+def get_cached_table(table):
+
+    return get_table_index(table).df
+
+
+def invalidate_cache(table=None):
+
+    roster_cache.invalidate(table)
+
+
+# ===============================
+# FLEET SNAPSHOTS
+# ===============================
+# Consistent point-in-time view of all three tables (see
+# core/fleet_snapshot.py). Rebuilt only when a table version moves on;
+# readers get the current one without taking a lock.
+
+_fleet_snapshot = None
+_fleet_snapshot_lock = threading.Lock()
+
+
+def get_fleet_snapshot():
+
+    global _fleet_snapshot
+
+    # Load missing tables and schedule stale refreshes as usual
+    for table in TABLES:
+        get_table_index(table)
+
+    entries = roster_cache.entries(TABLES)
+
+    versions = tuple(entry.version if entry else 0 for entry in entries.values())
+
+    current = _fleet_snapshot
+
+    if current is not None and current.table_versions == versions:
+        return current
+
+    with _fleet_snapshot_lock:
+
+        current = _fleet_snapshot
+
+        if current is not None and current.table_versions == versions:
+            return current
+
+        indexes = [
+            entry.value if entry else TableIndex(pd.DataFrame(), **TABLE_INDEXES[table])
+            for table, entry in entries.items()
+        ]
+
+        snapshot = FleetSnapshot(*indexes, versions, previous=current)
+
+        # Never swap back to an older view than the one installed
+        if current is None or all(
+            new >= old for new, old in zip(versions, current.table_versions)
+        ):
+            _fleet_snapshot = snapshot
+
+        return snapshot
+
+
+# ===============================
+# PILOTS
+# ===============================
+
+def get_pilots_cached():
+
+    return get_cached_table(PILOTS_TABLE)
+
+
+def get_pilots():
+
+    return get_pilots_cached().copy(deep=False)
+
+
+# ===============================
+# DRONES
+# ===============================
+
+def get_drones_cached():
 
-        return pd.DataFrame()
+    return get_cached_table(DRONES_TABLE)
 
 
 def get_drones():
 
-    return get_drones_cached().copy()
+    return get_drones_cached().copy(deep=False)
 
 
 # ===============================
 # MISSIONS
 # ===============================
 
-@lru_cache(maxsize=1)
 def get_missions_cached():
 
-    try:
+    return get_cached_table(MISSIONS_TABLE)
 
-        sheet = spreadsheet.worksheet("missions")
 
-        data = sheet.get_all_records()
+def get_missions():
 
-        logging.info("Mission data fetched")
+    return get_missions_cached().copy(deep=False)
 
-        return pd.DataFrame(data)
 
-    except Exception as e:
+# ===============================
+# BATCHED WRITES
+# ===============================
+# Changes are queued per table and row key, written upstream in one
+# batched call per table, then patched into the cached snapshot so the
+# next read neither refetches nor sees stale data.
 
-        logging.error(f"Mission fetch error: {e}")
+def patch_rows(table, updates):
 
-        return pd.DataFrame()
+    def patch(index):
 
+        df = index.df.copy(deep=False)
 
-def get_missions():
+        for key, fields in updates.items():
+
+            pos = index.keys.get(key)
+
+            if pos is None:
+                continue
+
+            for column, value in fields.items():
+
+                if column not in df.columns:
+                    continue
+
+                if df[column].dtype != object:
+                    df[column] = df[column].astype(object)
+
+                df.iloc[pos, df.columns.get_loc(column)] = value
+
+        return index.refresh(df)
+
+    return patch
+
+
+def apply_changes(changes):
+
+    # {table: {key: fields}}, all tables patched in the cache together
+    patched = roster_cache.update_many({
+        table: patch_rows(table, updates)
+        for table, updates in changes.items()
+    })
+
+    # Hand the written rows to the other workers as well
+    for table, index in patched.items():
+        publish(table, index.df)
+
+
+def apply_updates(table, updates):
+
+    apply_changes({table: updates})
+
+
+class WriteBatch:
+
+
+    def __init__(self):
+
+        self.updates = {}
+        self.expected = {}
+
+
+    def update(self, table, key, **fields):
+
+        self.updates.setdefault(table, {}).setdefault(key, {}).update(fields)
 
-    return get_missions_cached().copy()
+        return self
+
+
+    def expect(self, table, key, **fields):
+
+        # commit() only writes if the stored row still holds these values
+        self.expected.setdefault(table, {}).setdefault(key, {}).update(fields)
+
+        return self
+
+
+    def flush(self):
+
+        applied = {}
+
+        for table, updates in self.updates.items():
+
+            keys = call_backend(
+                "update_rows",
+                table,
+                TABLE_INDEXES[table]["key"],
+                updates
+            )
+
+            apply_updates(table, {key: updates[key] for key in keys})
+
+            applied[table] = keys
+
+        self.updates = {}
+
+        return applied
+
+
+    def commit(self):
+
+        # All tables or none: the backend rolls back on any failure and
+        # the cache is only patched once the upstream write succeeded
+        changes = [
+            (
+                table,
+                TABLE_INDEXES[table]["key"],
+                updates,
+                self.expected.get(table, {})
+            )
+            for table, updates in self.updates.items()
+        ]
+
+        call_backend("commit", changes)
+
+        apply_changes(self.updates)
+
+        self.updates = {}
+        self.expected = {}
 
 
 # ===============================
@@ -148,31 +589,235 @@ def update_pilot_status(pilot_id, new_status):
 
     try:
 
-        sheet = spreadsheet.worksheet("pilot_roster")
+        applied = WriteBatch().update(
+            PILOTS_TABLE,
+            pilot_id,
+            status=new_status
+        ).flush()
 
-        data = sheet.get_all_records()
+        if pilot_id in applied[PILOTS_TABLE]:
 
-        headers = sheet.row_values(1)
+            logging.info(f"Pilot {pilot_id} updated to {new_status}")
 
-        status_col = headers.index("status") + 1
+            return f"Pilot {pilot_id} status updated to {new_status}"
 
-        for i, row in enumerate(data):
+        return "Pilot not found"
 
-            if row["pilot_id"] == pilot_id:
+    except Exception as e:
 
-                sheet.update_cell(i + 2, status_col, new_status)
+        logging.error(f"Pilot update error: {e}")
 
-                logging.info(f"Pilot {pilot_id} updated to {new_status}")
+        return "Error updating pilot"
 
-                # Clear cache properly
-                get_pilots_cached.cache_clear()
 
-                return f"Pilot {pilot_id} status updated to {new_status}"
+# ===============================
+# UPDATE DRONE STATUS
+# ===============================
 
-        return "Pilot not found"
+def update_drone_status(drone_id, new_status):
+
+    try:
+
+        applied = WriteBatch().update(
+            DRONES_TABLE,
+            drone_id,
+            status=new_status
+        ).flush()
+
+        if drone_id in applied[DRONES_TABLE]:
+
+            logging.info(f"Drone {drone_id} updated to {new_status}")
+
+            return f"Drone {drone_id} status updated to {new_status}"
+
+        return "Drone not found"
 
     except Exception as e:
 
-        logging.error(f"Pilot update error: {e}")
+        logging.error(f"Drone update error: {e}")
 
-        return "Error updating pilot"
+        return "Error updating drone"
+
+
+# ===============================
+# UPDATE MISSION STATUS
+# ===============================
+
+def update_mission_status(project_id, new_status):
+
+    try:
+
+        applied = WriteBatch().update(
+            MISSIONS_TABLE,
+            project_id,
+            status=new_status
+        ).flush()
+
+        if project_id in applied[MISSIONS_TABLE]:
+
+            logging.info(f"Mission {project_id} updated to {new_status}")
+
+            return f"Mission {project_id} status updated to {new_status}"
+
+        return "Mission not found"
+
+    except Exception as e:
+
+        logging.error(f"Mission update error: {e}")
+
+        return "Error updating mission"
+
+
+# ===============================
+# ASSIGN RESOURCES
+# ===============================
+# Books pilot and drone on the mission in one transactional commit.
+# Mission columns are only written when the sheet has them.
+# current_assignment is written with compare-and-set against the value
+# it was built from. When another writer changed it first, the stored
+# bookings are checked against the mission window again and the write is
+# rebuilt from them (ASSIGN_ATTEMPTS writes at most), or abandoned if
+# one of them overlaps.
+
+MISSION_ASSIGNMENT_COLUMNS = ("status", "assigned_pilot", "assigned_drone")
+
+ASSIGN_ATTEMPTS = 3
+
+
+def add_assignment(current, project_id):
+
+    assignments = split_assignments(current)
+
+    if project_id not in assignments:
+        assignments.append(project_id)
+
+    return ", ".join(assignments)
+
+
+def overlapping_booking(missions, assignment, mission):
+
+    # First project in assignment whose window overlaps mission. Projects
+    # missing from the snapshot or without dates cannot be cleared.
+    for booked_id in split_assignments(assignment):
+
+        if booked_id == mission["project_id"]:
+            continue
+
+        booked = missions.get(booked_id)
+
+        if booked is None:
+            return booked_id
+
+        start, end = booked["start_date"], booked["end_date"]
+
+        if pd.isna(start) or pd.isna(end):
+            return booked_id
+
+        if start <= mission["end_date"] and mission["start_date"] <= end:
+            return booked_id
+
+    return None
+
+
+def assign_resources(project_id, pilot_id, drone_id, snapshot=None):
+
+    try:
+
+        # Callers pass the snapshot their conflict checks read
+        if snapshot is None:
+            snapshot = get_fleet_snapshot()
+
+        pilot = snapshot.pilot(pilot_id)
+        drone = snapshot.drone(drone_id)
+        missions = snapshot.missions
+
+        if pilot is None:
+            return "Pilot not found"
+
+        if drone is None:
+            return "Drone not found"
+
+        if project_id not in missions:
+            return "Mission not found"
+
+        # Assignments last read for each resource; the snapshot may be
+        # older than the upstream row
+        current = {
+            PILOTS_TABLE: {pilot_id: pilot["current_assignment"]},
+            DRONES_TABLE: {drone_id: drone["current_assignment"]}
+        }
+
+        mission_fields = {
+            column: value
+            for column, value in zip(
+                MISSION_ASSIGNMENT_COLUMNS,
+                ("Assigned", pilot_id, drone_id)
+            )
+            if column in missions.df.columns
+        }
+
+        for attempt in range(ASSIGN_ATTEMPTS):
+
+            batch = WriteBatch()
+
+            for table, assignments in current.items():
+
+                for key, assignment in assignments.items():
+
+                    batch.update(
+                        table,
+                        key,
+                        status="Assigned",
+                        current_assignment=add_assignment(assignment, project_id)
+                    )
+
+                    # Compare-and-set: another worker may have added a
+                    # booking to this row since our snapshot was taken
+                    batch.expect(table, key, current_assignment=assignment)
+
+            if mission_fields:
+                batch.update(MISSIONS_TABLE, project_id, **mission_fields)
+
+            try:
+
+                batch.commit()
+
+                break
+
+            except StaleRowError as e:
+
+                if attempt == ASSIGN_ATTEMPTS - 1:
+                    raise
+
+                stored = e.current["current_assignment"]
+
+                # Bookings made elsewhere were never conflict checked here
+                clash = overlapping_booking(missions, stored, missions.get(project_id))
+
+                if clash is not None:
+
+                    logging.warning(f"{e}, now also booked on {clash}")
+
+                    label = "Pilot" if e.table == PILOTS_TABLE else "Drone"
+
+                    return f"{label} {e.key} was booked on {clash} meanwhile"
+
+                logging.warning(f"{e}, retrying with the stored assignment")
+
+                current[e.table][e.key] = stored
+
+        logging.info(
+            f"Project {project_id} assigned to pilot {pilot_id} "
+            f"and drone {drone_id}"
+        )
+
+        return (
+            f"Project {project_id} assigned to pilot {pilot_id} "
+            f"and drone {drone_id}"
+        )
+
+    except Exception as e:
+
+        logging.error(f"Resource assignment error: {e}")
+
+        return "Error assigning resources"
@@ -0,0 +1,471 @@
+import os
+import json
+import time
+import logging
+import threading
+
+import numpy as np
+import pyarrow as pa
+
+
+# ===============================
+# SHARED SNAPSHOT STORE
+# ===============================
+# Lets every uvicorn worker share one copy of each table and one
+# upstream refresh. A worker whose cache expires first looks in the
+# store; only when the stored copy was fetched from upstream longer ago
+# than the table TTL does it take the refresh lock, fetch upstream and
+# publish the result. Workers that lose the race wait for the winner
+# instead of fetching too.
+#
+# Local writes republish the patched table without touching its fetch
+# time, so frequent writes never hold off the upstream refresh. A fetch
+# never overwrites a copy saved after it started: that copy already
+# carries a write the fetched one may predate.
+#
+# Tables are stored in Arrow IPC format. On disk the file is memory
+# mapped, so numeric and date columns are used straight from the page
+# cache and a restarted worker can serve the last snapshot immediately.
+# Columns Arrow cannot type (mixed numbers and blanks from a sheet) are
+# stored as strings next to a type code per cell and converted back on
+# load. Nothing is ever unpickled: the store may be shared, and loading
+# must not run code written by whoever can write to it.
+#
+# SNAPSHOT_STORE = snapshots           directory on local disk (default)
+#                  redis://host:6379/0 Redis or any Redis-protocol server
+#                  off                 disabled
+
+LOCK_TIMEOUT = 30
+
+
+# ===============================
+# ARROW ENCODING
+# ===============================
+
+# Mixed columns: cell text plus MIXED_PREFIX<column> holding one of
+# these codes, listed under MIXED_METADATA in the schema metadata
+MIXED_PREFIX = "__type__"
+MIXED_METADATA = b"fleet.mixed_columns"
+
+TEXT, INTEGER, FLOAT, BOOLEAN, NULL = range(5)
+
+ARROW_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+
+
+def encode_cell(value):
+
+    if value is None:
+        return "", NULL
+
+    if isinstance(value, (bool, np.bool_)):
+        return str(bool(value)), BOOLEAN
+
+    if isinstance(value, (int, np.integer)):
+        return str(int(value)), INTEGER
+
+    if isinstance(value, (float, np.floating)):
+        return repr(float(value)), FLOAT
+
+    return str(value), TEXT
+
+
+def decode_cell(text, code):
+
+    if code == INTEGER:
+        return int(text)
+
+    if code == FLOAT:
+        return float(text)
+
+    if code == BOOLEAN:
+        return text == "True"
+
+    if code == NULL:
+        return None
+
+    return text
+
+
+def to_arrow(df):
+
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except ARROW_ERRORS:
+        pass
+
+    df = df.copy(deep=False)
+
+    mixed = []
+
+    for column in df.columns[df.dtypes == object]:
+
+        try:
+
+            pa.array(df[column], from_pandas=True)
+
+            continue
+
+        except ARROW_ERRORS:
+            pass
+
+        cells = [encode_cell(value) for value in df[column].tolist()]
+
+        df[column] = [text for text, _ in cells]
+        df[f"{MIXED_PREFIX}{column}"] = np.array([code for _, code in cells], dtype=np.int8)
+
+        mixed.append(column)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    return table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        MIXED_METADATA: json.dumps(mixed).encode()
+    })
+
+
+def object_array(values):
+
+    # Keep ints, floats and strings side by side as they came from upstream
+    array = np.empty(len(values), dtype=object)
+
+    array[:] = values
+
+    return array
+
+
+def from_arrow(table):
+
+    df = table.to_pandas(split_blocks=True)
+
+    metadata = table.schema.metadata or {}
+
+    for column in json.loads(metadata.get(MIXED_METADATA, b"[]")):
+
+        codes = df.pop(f"{MIXED_PREFIX}{column}").tolist()
+
+        df[column] = object_array([
+            decode_cell(text, code)
+            for text, code in zip(df[column].tolist(), codes)
+        ])
+
+    return df
+
+
+def write_ipc(sink, table):
+
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_ipc(source):
+
+    return from_arrow(pa.ipc.open_file(source).read_all())
+
+
+# ===============================
+# DIRECTORY STORE
+# ===============================
+
+class FileSnapshotStore:
+
+
+    def __init__(self, directory):
+
+        self.directory = directory
+
+        os.makedirs(directory, exist_ok=True)
+
+
+    def _path(self, table, suffix="arrow"):
+
+        return os.path.join(self.directory, f"{table}.{suffix}")
+
+
+    def fetched_at(self, table):
+
+        try:
+
+            with open(self._path(table, "fetched")) as f:
+                return float(f.read())
+
+        except (FileNotFoundError, ValueError):
+
+            return None
+
+
+    def load(self, table):
+
+        try:
+            return read_ipc(pa.memory_map(self._path(table)))
+        except FileNotFoundError:
+            return None
+
+
+    def _replace(self, table, suffix, write):
+
+        # Write then rename so readers never see a partial file. The temp
+        # name is unique per thread: the refresh thread and request
+        # threads of one worker can save the same table at once
+        tmp = self._path(table, f"{os.getpid()}.{threading.get_ident()}.tmp")
+
+        try:
+
+            write(tmp)
+
+            os.replace(tmp, self._path(table, suffix))
+
+        except BaseException:
+
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+
+            raise
+
+
+    def saved_at(self, table):
+
+        try:
+            return os.stat(self._path(table)).st_mtime
+        except FileNotFoundError:
+            return None
+
+
+    def save(self, table, df, fetched_at=None):
+
+        # fetched_at is given when df was just read from upstream and left
+        # out when df is the previous copy with local writes patched in.
+        # Returns False when a newer copy is already stored.
+        if fetched_at is not None and (self.saved_at(table) or 0) > fetched_at:
+            return False
+
+        arrow = to_arrow(df)
+
+        def write(tmp):
+
+            with pa.OSFile(tmp, "wb") as sink:
+                write_ipc(sink, arrow)
+
+        self._replace(table, "arrow", write)
+
+        # Written after the data so a new fetch time never points at the
+        # previous copy
+        if fetched_at is not None:
+
+            def write_time(tmp):
+
+                with open(tmp, "w") as f:
+                    f.write(repr(fetched_at))
+
+            self._replace(table, "fetched", write_time)
+
+        return True
+
+
+    def acquire(self, table):
+
+        path = self._path(table, "lock")
+
+        # Second attempt only after breaking a lock left behind by a
+        # crashed worker, so the caller does not wait for it to expire
+        for _ in range(2):
+
+            try:
+
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+
+                os.close(fd)
+
+                return True
+
+            except FileExistsError:
+                pass
+
+            try:
+
+                if time.time() - os.stat(path).st_mtime <= LOCK_TIMEOUT:
+                    return False
+
+                os.remove(path)
+
+            except FileNotFoundError:
+                pass
+
+        return False
+
+
+    def release(self, table):
+
+        try:
+            os.remove(self._path(table, "lock"))
+        except FileNotFoundError:
+            pass
+
+
+# ===============================
+# REDIS STORE
+# ===============================
+
+class RedisSnapshotStore:
+
+
+    def __init__(self, url, prefix="fleet"):
+
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+
+    def _key(self, table, suffix):
+
+        return f"{self.prefix}:{table}:{suffix}"
+
+
+    def fetched_at(self, table):
+
+        value = self.client.get(self._key(table, "fetched_at"))
+
+        return float(value) if value is not None else None
+
+
+    def load(self, table):
+
+        data = self.client.get(self._key(table, "data"))
+
+        if data is None:
+            return None
+
+        # Entries written in any other format are ignored, never decoded
+        if self.client.get(self._key(table, "format")) != b"arrow":
+            return None
+
+        return read_ipc(pa.BufferReader(data))
+
+
+    def saved_at(self, table):
+
+        value = self.client.get(self._key(table, "saved_at"))
+
+        return float(value) if value is not None else None
+
+
+    def save(self, table, df, fetched_at=None):
+
+        # Same contract as FileSnapshotStore.save
+        if fetched_at is not None and (self.saved_at(table) or 0) > fetched_at:
+            return False
+
+        sink = pa.BufferOutputStream()
+
+        write_ipc(sink, to_arrow(df))
+
+        data = sink.getvalue().to_pybytes()
+
+        pipe = self.client.pipeline(transaction=True)
+
+        pipe.set(self._key(table, "data"), data)
+        pipe.set(self._key(table, "format"), "arrow")
+        pipe.set(self._key(table, "saved_at"), time.time())
+
+        if fetched_at is not None:
+            pipe.set(self._key(table, "fetched_at"), fetched_at)
+
+        pipe.execute()
+
+        return True
+
+
+    def acquire(self, table):
+
+        return bool(self.client.set(
+            self._key(table, "lock"),
+            os.getpid(),
+            nx=True,
+            ex=LOCK_TIMEOUT
+        ))
+
+
+    def release(self, table):
+
+        self.client.delete(self._key(table, "lock"))
+
+
+# ===============================
+# STORE SELECTION
+# ===============================
+
+def create_snapshot_store():
+
+    location = os.environ.get("SNAPSHOT_STORE", "snapshots")
+
+    if location.lower() in ("", "off", "none"):
+        return None
+
+    if location.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSnapshotStore(location)
+
+    return FileSnapshotStore(location)
+
+
+# ===============================
+# SHARED LOAD
+# ===============================
+
+def load_shared(store, table, max_age, fetch, wait_timeout=LOCK_TIMEOUT):
+
+    # {table: df}: the stored copy of table, or every table fetch(table)
+    # returned, all published. Age is measured from the upstream read,
+    # not from the last save.
+    fetched_at = store.fetched_at(table)
+
+    if fetched_at is not None and time.time() - fetched_at < max_age:
+
+        df = store.load(table)
+
+        if df is not None:
+            return {table: df}
+
+    if store.acquire(table):
+
+        try:
+
+            started = time.time()
+
+            data = fetch(table)
+
+            for name, df in data.items():
+
+                try:
+
+                    if store.save(name, df, fetched_at=started):
+                        logging.info(f"{name} published to shared snapshot store")
+
+                except Exception as e:
+
+                    logging.error(f"Snapshot store save failed for {name}: {e}")
+
+            return data
+
+        finally:
+
+            store.release(table)
+
+    # Another worker is refreshing this table, wait for its result
+    deadline = time.time() + wait_timeout
+
+    while time.time() < deadline:
+
+        time.sleep(0.1)
+
+        if (store.fetched_at(table) or 0) > (fetched_at or 0):
+
+            df = store.load(table)
+
+            if df is not None:
+                return {table: df}
+
+    logging.warning(f"Timed out waiting for shared {table}, fetching directly")
+
+    return fetch(table)
@@ -25,6 +25,75 @@ I can help you with: \n
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+if "rosters" not in st.session_state:
+    st.session_state.rosters = {}
+
+
+# ===============================
+# ROSTER SYNC
+# ===============================
+# Keeps the last copy of each list with its version (the ETag). Later
+# "show" commands only ask for rows changed since that version; an
+# unchanged list costs a 304 with no body.
+
+def fetch_roster(path, key):
+
+    cached = st.session_state.rosters.get(path)
+
+    if cached is None:
+
+        response = requests.get(f"{API_URL}/{path}")
+
+        rows = response.json()
+
+        etag = response.headers.get("ETag")
+
+        if isinstance(rows, list) and etag:
+
+            st.session_state.rosters[path] = {
+                "version": etag.strip('"'),
+                "rows": rows
+            }
+
+        return rows
+
+    response = requests.get(
+        f"{API_URL}/{path}",
+        params={"since": cached["version"]}
+    )
+
+    if response.status_code == 304:
+        return cached["rows"]
+
+    delta = response.json()
+
+    if "error" in delta:
+        return cached["rows"]
+
+    if delta["full"]:
+
+        rows = delta["changed"]
+
+    else:
+
+        changed = {row[key]: row for row in delta["changed"]}
+        deleted = set(delta["deleted"])
+
+        rows = [
+            changed.pop(row[key], row)
+            for row in cached["rows"]
+            if row[key] not in deleted
+        ]
+
+        rows.extend(changed.values())
+
+    st.session_state.rosters[path] = {
+        "version": delta["version"],
+        "rows": rows
+    }
+
+    return rows
+
 
 # ===============================
 # DISPLAY CHAT HISTORY
@@ -118,9 +187,7 @@ Reason:
         # ===============================
         elif command.lower() == "show pilots":
 
-            response = requests.get(f"{API_URL}/pilots")
-
-            pilots = response.json()
+            pilots = fetch_roster("pilots", "pilot_id")
 
             if not pilots:
                 return "No pilots found."
@@ -138,9 +205,7 @@ Reason:
         # ===============================
         elif command.lower() == "show drones":
 
-            response = requests.get(f"{API_URL}/drones")
-
-            drones = response.json()
+            drones = fetch_roster("drones", "drone_id")
 
             if not drones:
                 return "No drones found."
@@ -158,9 +223,7 @@ Reason:
         # ===============================
         elif command.lower() == "show missions":
 
-            response = requests.get(f"{API_URL}/missions")
-
-            missions = response.json()
+            missions = fetch_roster("missions", "project_id")
 
             if not missions:
                 return "No missions found."